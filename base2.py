@@ -1,182 +1,132 @@
 import cv2
-import numpy as np
-import math
+import os
+import time
+
+import warm_start
+from clip_recorder import ClipRecorder
+from detection_store import DetectionStore
+from fleet_uploader import FleetUploader
+from live_stream import LiveStream
+from pothole_map import PotholeMap, load_gps_track, position_at
+from pothole_detector import ROI_Y_START_FRAC, PotholeDetector, make_bg_sub
+from threshold_tuner import ThresholdTuner
+from trip_analytics import TripAnalytics
+from wheel_corridor import WheelCorridor
 
 VIDEO_IN  = "pothole_road_sample1.mp4"
-
-# TUNABLE PARAMETERS (start with these; tweak if many false+ or misses)
-MIN_AREA        = 6000
-MAX_AREA        = 40000
-DARK_MEAN_THRESH= 200
-ASPECT_RATIO_MIN= 1.2
-ASPECT_RATIO_MAX= 3.2
-ROI_Y_START_FRAC = 0.35
-
-CONFIRM_FRAMES   = 3   
-MAX_LOST_FRAMES  = 5    
-MAX_MATCH_DIST   = 60   
-
-# Background subtractor helps isolate transient road defects
-bg_sub = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=50, detectShadows=False)
-
-cap = cv2.VideoCapture(VIDEO_IN)
+STREAM_TO_DASHBOARD = True   # serve events + annotated frames for live-cam.html
+LOG_DIR = "detection_log"    # columnar detection/track log, one sub-directory per run
+GPS_TRACK = os.path.splitext(VIDEO_IN)[0] + ".gps.csv"   # optional sidecar: t,lat,lon
+VEHICLE_ID = "vehicle-1"
+RECORD_CLIPS = True         # pre/post-roll clip around each confirmation (see clip_recorder.py)
+WHEEL_CORRIDOR = False      # only search/confirm inside the tyre paths; enable once wheel_corridor.py is calibrated
+UPLOAD_EVENTS = True        # spool confirmations for the fleet backend (endpoint/budgets in fleet_uploader.py)
+AUTO_TUNE = True            # adapt Canny/dark/area thresholds to lighting and road texture (threshold_tuner.py)
+SEED_BACKGROUND = False     # seed MOG2 from this source's last snapshot; no earlier confirmations on the samples yet
+
+# Detector parameters (MIN_AREA, DARK_MEAN_THRESH, CONFIRM_FRAMES, ...) live in pothole_detector.py;
+# with AUTO_TUNE the area/dark/Canny values there are only the starting point
+bg_sub = make_bg_sub()
+
+# Open the source and restore the saved background snapshot at the same time
+t_boot = time.perf_counter()
+restored, boot_times = warm_start.restore_parallel(
+    cap=lambda: cv2.VideoCapture(VIDEO_IN),
+    background=lambda: warm_start.load_background(VIDEO_IN) if SEED_BACKGROUND else None)
+cap = restored['cap']
 if not cap.isOpened():
     raise SystemExit("Cannot open video file: " + VIDEO_IN)
 
 W  = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
 H  = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7,7))
+corridor = WheelCorridor(W, H, int(H * ROI_Y_START_FRAC)) if WHEEL_CORRIDOR else None
+detector = PotholeDetector(W, H, bg_sub, corridor)
+tuner = ThresholdTuner(detector) if AUTO_TUNE else None
+if corridor:
+    print(f"Wheel corridors: processing {corridor.window_fraction:.0%} of the ROI, "
+          f"tyre paths cover {corridor.coverage_fraction:.0%}")
+
+bg_seed = restored['background']
+if bg_seed is not None and bg_seed.shape == detector.roi_shape:
+    warm_start.seed_background(bg_sub, bg_seed)
+    print("Background seeded from snapshot")
+print("Boot: " + ", ".join(f"{k}={v*1000:.0f}ms" for k, v in boot_times.items()))
+
+stream = None
+if STREAM_TO_DASHBOARD:
+    try:
+        stream = LiveStream().start()
+    except OSError as e:
+        print(f"Live stream disabled: {e}")
+analytics = TripAnalytics(detector.roi_shape[0] * detector.roi_shape[1])
+run_name = os.path.splitext(os.path.basename(VIDEO_IN))[0] + time.strftime("_%Y%m%d_%H%M%S")
+store = DetectionStore(os.path.join(LOG_DIR, run_name))
+gps = load_gps_track(GPS_TRACK) if os.path.exists(GPS_TRACK) else None
+pothole_map = PotholeMap.load()
+uploader = FleetUploader(vehicle_id=VEHICLE_ID).start() if UPLOAD_EVENTS else None
 
 print("Processing live... Press ESC or 'q' to quit")
 fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+recorder = ClipRecorder(fps) if RECORD_CLIPS else None
 speed = 0.8
 delay = int((1000 / fps)*speed)
 
-frame_idx = 0
-
-# TRACKING state
-next_track_id = 1
-tracks = {}  # { 'bbox':(x,y,w,h), 'centroid':(cx,cy), 'first_seen':frame_idx, 'last_seen':frame_idx, 'consecutive':n, 'counted':bool }
-unique_pothole_count = 0
-
-def centroid_from_bbox(bbox):
-    x, y, w, h = bbox
-    return (int(x + w/2), int(y + h/2))
-
-def euclid(a, b):
-    return math.hypot(a[0]-b[0], a[1]-b[1])
+first_detection_time = None
+first_confirm_time = None
 
 while True:
     ret, frame = cap.read()
     if not ret:
         break
-    frame_idx += 1
-
-    # 1) ROI crop
-    y_start = int(H * ROI_Y_START_FRAC)
-    roi = frame[y_start:H, 0:W]
-
-    # 2) Preprocess
-    gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-    gray_blur = cv2.GaussianBlur(gray, (7,7), 0)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-    gray_eq = clahe.apply(gray_blur)
-
-    # 3) Background subtraction
-    fg = bg_sub.apply(gray_eq)
-    fg = cv2.morphologyEx(fg, cv2.MORPH_OPEN, kernel, iterations=1)
-    fg = cv2.morphologyEx(fg, cv2.MORPH_CLOSE, kernel, iterations=2)
-
-    # 4) Edge + dark region detection combined
-    edges = cv2.Canny(gray_eq, 60, 140)
-    _, dark = cv2.threshold(gray_eq, DARK_MEAN_THRESH, 255, cv2.THRESH_BINARY_INV)
-
-    combined = cv2.bitwise_and(fg, dark)
-    combined = cv2.bitwise_or(combined, edges)
-    combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel, iterations=2)
-    combined = cv2.morphologyEx(combined, cv2.MORPH_OPEN, kernel, iterations=1)
-
-    # 5) Find contours and filter
-    contours, _ = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    detections = []
-    for cnt in contours:
-        area = cv2.contourArea(cnt)
-        if area < MIN_AREA or area > MAX_AREA:
-            continue
-        x, y, w, h = cv2.boundingRect(cnt)
-        ar = w / float(h + 1e-6)
-        if not (ASPECT_RATIO_MIN <= ar <= ASPECT_RATIO_MAX):
-            continue
-        bbox_area = w * h
-        solidity = float(area) / (bbox_area + 1e-6)
-        if solidity < 0.2:
-            continue
-        roi_patch = gray_eq[y:y+h, x:x+w]
-        mean_int = float(np.mean(roi_patch)) if roi_patch.size else 255
-        if mean_int > DARK_MEAN_THRESH + 20:
-            continue
-        detections.append((x, y, w, h, area, mean_int))
-
-    # TRACKING: match detections -> existing tracks (centroid distance)
-    unmatched_dets = set(range(len(detections)))
-    matched_tracks = set()
-    det_centroids = [centroid_from_bbox((d[0], d[1], d[2], d[3])) for d in detections]
-
-    # Build list of track centroids (in ROI coords)
-    track_items = list(tracks.items())  # (track_id, data)
-    # For each detection, try to find the closest track
-    for di, det_c in enumerate(det_centroids):
-        best_tid = None
-        best_dist = float('inf')
-        for tid, tdata in track_items:
-            if tid in matched_tracks:
-                continue
-            dist = euclid(det_c, tdata['centroid'])
-            if dist < best_dist:
-                best_dist = dist
-                best_tid = tid
-        if best_tid is not None and best_dist <= MAX_MATCH_DIST:
-            # match detected
-            x, y, w, h, area, mean_int = detections[di]
-            tracks[best_tid]['bbox'] = (x, y, w, h)
-            tracks[best_tid]['centroid'] = det_centroids[di]
-            # If last_seen was previous frame, increment consecutive, else set to 1
-            if frame_idx - tracks[best_tid]['last_seen'] == 1:
-                tracks[best_tid]['consecutive'] += 1
-            else:
-                tracks[best_tid]['consecutive'] = 1
-            tracks[best_tid]['last_seen'] = frame_idx
-            matched_tracks.add(best_tid)
-            unmatched_dets.discard(di)
-
-    # Create new tracks for unmatched detections
-    for di in list(unmatched_dets):
-        x, y, w, h, area, mean_int = detections[di]
-        cid = next_track_id
-        next_track_id += 1
-        tracks[cid] = {
-            'bbox': (x, y, w, h),
-            'centroid': det_centroids[di],
-            'first_seen': frame_idx,
-            'last_seen': frame_idx,
-            'consecutive': 1,
-            'counted': False
-        }
-
-    # Check confirmation: if any track reached CONFIRM_FRAMES and not yet counted -> count it
-    for tid, tdata in list(tracks.items()):
-        if (not tdata['counted']) and (tdata['consecutive'] >= CONFIRM_FRAMES):
-            tdata['counted'] = True
-            unique_pothole_count += 1
-            # Only print when we confirm a stable new pothole
-            print("signal----------")
-            print(f"Confirmed pothole id={tid} at frame {frame_idx} (seen {tdata['consecutive']} consecutive frames).")
-
-    # Remove stale tracks
-    to_delete = []
-    for tid, tdata in tracks.items():
-        if frame_idx - tdata['last_seen'] > MAX_LOST_FRAMES:
-            to_delete.append(tid)
-    for tid in to_delete:
-        del tracks[tid]
-
-    # 6) Draw detections (convert coords back to full frame)
-    for (x, y, w, h, area, mean_int) in detections:
-        top_left = (x, y + y_start)
-        bottom_right = (x + w, y + h + y_start)
-        cv2.rectangle(frame, top_left, bottom_right, (0, 0, 255), 2)
-        label = f"Pothole? A={int(area)} I={int(mean_int)}"
-        cv2.putText(frame, label, (top_left[0], max(top_left[1]-6,0)), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0,0,255), 1, cv2.LINE_AA)
-
-    # Optional: draw active tracks and their status (counted or not) — lightly helpful for debugging
-    for tid, tdata in tracks.items():
-        x, y, w, h = tdata['bbox']
-        tl = (int(x), int(y + y_start))
-        br = (int(x + w), int(y + h + y_start))
-        color = (0,255,0) if tdata['counted'] else (255,165,0)  # green if counted, orange otherwise
-        cv2.rectangle(frame, tl, br, color, 1)
-        cv2.putText(frame, f"id{tid} c{tdata['consecutive']}", (tl[0], max(tl[1]-8,0)), cv2.FONT_HERSHEY_SIMPLEX, 0.45, color, 1, cv2.LINE_AA)
+    t_frame = time.perf_counter()
+
+    detections, confirmed = detector.process(frame)
+    if tuner:
+        tuner.update()
+    frame_idx = detector.frame_idx
+    trip_t = frame_idx / fps
+    analytics.on_frame(trip_t, detections)
+    store.append_detections(frame_idx, trip_t, detections)
+    for event, tid, tdata in detector.track_events:
+        store.append_track(event, tid, frame_idx, trip_t, tdata)
+    if recorder:
+        recorder.push(frame, frame_idx)
+
+    if detections and first_detection_time is None:
+        first_detection_time = time.perf_counter() - t_boot
+        print(f"Time to first valid detection: {first_detection_time:.2f}s (frame {frame_idx})")
+
+    for tid, tdata in confirmed:
+        kind = tdata['kind']
+        if first_confirm_time is None:
+            first_confirm_time = time.perf_counter() - t_boot
+            print(f"Time to first confirmed detection: {first_confirm_time:.2f}s (frame {frame_idx})")
+        # Only print when we confirm a stable new obstacle
+        print("signal----------")
+        wheels = "+".join(tdata['wheels']) or "-"
+        print(f"Confirmed {kind} id={tid} at frame {frame_idx} (seen {tdata['consecutive']} consecutive frames, wheel: {wheels}).")
+        analytics.on_confirm(trip_t, kind, (time.perf_counter() - t_frame) * 1000)
+        if recorder:
+            recorder.trigger(kind, frame_idx, {'track_id': tid, 'bbox': list(tdata['bbox'])})
+        pos = position_at(gps, trip_t) if gps and kind == 'pothole' else None
+        if pos:
+            pid, is_new = pothole_map.ingest(pos[0], pos[1], time.time(), VEHICLE_ID, tdata['area'])
+            print(f"Mapped as pothole #{pid} ({'new' if is_new else 'seen before'}) at {pos[0]:.6f},{pos[1]:.6f}")
+        if stream:
+            x, y, w, h = tdata['bbox']
+            stream.publish_event({'type': kind, 'id': tid, 'frame': frame_idx, 'ts': time.time(),
+                                  'bbox': [x, y + detector.y_start, w, h], 'wheels': list(tdata['wheels'])})
+        if uploader:
+            uploader.enqueue({'event_id': f"{VEHICLE_ID}:{run_name}:{kind}:{tid}", 'type': kind, 'track_id': tid,
+                              'frame': frame_idx, 'trip_t': round(trip_t, 3), 'ts': time.time(),
+                              'area': tdata['area'], 'wheels': list(tdata['wheels']),
+                              'lat': pos[0] if pos else None, 'lon': pos[1] if pos else None})
+
+    analytics.write()
+    detector.draw(frame, detections)
+    if stream:
+        stream.publish_frame(frame)
 
     cv2.imshow('Pothole Detector - Press ESC or Q to quit', frame)
     key = cv2.waitKey(delay) & 0xFF
@@ -185,4 +135,21 @@ while True:
 
 cap.release()
 cv2.destroyAllWindows()
-print("Done. Processed {} frames. Final confirmed potholes: {}.".format(frame_idx, unique_pothole_count))
+if stream:
+    stream.stop()
+warm_start.save_background(bg_sub, VIDEO_IN)
+analytics.write(force=True)
+store.close()
+if recorder:
+    recorder.close()
+    print(f"Clips written: {recorder.clips_written} (evicted: {recorder.clips_evicted})")
+if tuner:
+    print(f"Threshold tuner: {len(tuner.decisions)} adjustments, final {tuner.settings()}")
+if uploader:
+    uploader.stop()
+    print(f"Uploaded {uploader.stats['sent_events']} events, {uploader.pending_segments()} batches left in the spool")
+if gps:
+    pothole_map.save()
+print("Done. Processed {} frames. Final confirmed potholes: {} (puddles: {}, bumps: {}).".format(
+    detector.frame_idx, detector.unique_pothole_count,
+    detector.confirmed_counts['puddle'], detector.confirmed_counts['bump']))
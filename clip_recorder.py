@@ -0,0 +1,206 @@
+"""
+clip_recorder.py
+Event-triggered clip recording around confirmations.
+
+push() only downscales the frame by CLIP_SCALE and hands it to an encoder
+thread; a full hand-off queue drops the frame rather than stall detection.
+The encoder thread keeps the last PRE_ROLL_SEC of frames as JPEGs (about
+3 MB for 3 s of 720p at 0.5, instead of about 60 MB raw) and runs the clip
+state. trigger() opens a clip from that pre-roll, and the following
+POST_ROLL_SEC of frames go to a writer thread, which decodes the pre-roll
+and encodes the clip with cv2.VideoWriter; a small JSON sidecar is written
+when the clip closes. Triggers that land inside an open clip extend it
+instead of starting a second one, up to MAX_CLIP_SEC, after which the clip
+is sealed and recording continues in a new one. When the clip directory
+grows past DISK_BUDGET_MB the oldest clips are evicted.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# -----------------------
+# Configuration
+# -----------------------
+CLIP_DIR = "clips"
+PRE_ROLL_SEC = 3.0
+POST_ROLL_SEC = 2.0
+CLIP_SCALE = 0.5          # clips are recorded at this fraction of the input size
+JPEG_QUALITY = 90         # pre-roll ring compression
+ENCODE_QUEUE = 32         # frames waiting for the encoder thread before push() drops
+MAX_CLIP_SEC = 20.0
+DISK_BUDGET_MB = 500
+FOURCC = "mp4v"
+# -----------------------
+
+
+class ClipRecorder:
+    """JPEG pre-roll ring + background clip writer with a disk budget"""
+
+    def __init__(self, fps, out_dir=CLIP_DIR, pre_roll_sec=PRE_ROLL_SEC, post_roll_sec=POST_ROLL_SEC,
+                 disk_budget_mb=DISK_BUDGET_MB, max_clip_sec=MAX_CLIP_SEC, scale=CLIP_SCALE):
+        self.fps = fps
+        self.out_dir = out_dir
+        self.scale = scale
+        self.post_frames = max(1, int(round(post_roll_sec * fps)))
+        self.max_frames = max(1, int(round(max_clip_sec * fps)))
+        self.budget = int(disk_budget_mb * 1024 * 1024)
+        self.pre_roll = deque(maxlen=max(1, int(round(pre_roll_sec * fps))))  # (frame_idx, jpeg)
+        self.active = None  # clip currently collecting post-roll (encoder thread only)
+        self.encode_q = queue.Queue(maxsize=ENCODE_QUEUE)
+        self.write_q = queue.Queue()
+        self.frames_dropped = 0
+        self.clips_written = 0
+        self.clips_evicted = 0
+        os.makedirs(out_dir, exist_ok=True)
+        self.encoder = threading.Thread(target=self._encoder_loop, daemon=True)
+        self.writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self.encoder.start()
+        self.writer.start()
+
+    def push(self, frame, frame_idx):
+        """Add one (unannotated) frame; call every frame"""
+        if self.scale != 1.0:
+            small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            small = frame.copy()  # the caller draws on frame afterwards
+        try:
+            self.encode_q.put_nowait(('frame', frame_idx, small))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def trigger(self, label, frame_idx, meta=None):
+        """Start (or extend) a clip around frame_idx"""
+        event = {'label': label, 'frame': frame_idx, 'ts': time.time(), **(meta or {})}
+        self.encode_q.put(('trigger', event, None))  # never dropped
+
+    def close(self):
+        """Flush any open clip and wait for the encoder and writer"""
+        self.encode_q.put(None)
+        self.encoder.join()
+        self.writer.join()
+
+    # -- encoder thread: pre-roll ring and clip state --
+
+    def _encoder_loop(self):
+        while True:
+            msg = self.encode_q.get()
+            if msg is None:
+                if self.active is not None:
+                    self._finish()
+                self.write_q.put(None)
+                return
+            op, a, b = msg
+            try:
+                if op == 'frame':
+                    self._on_frame(a, b)
+                else:
+                    self._on_trigger(a)
+            except Exception as e:
+                print("Clip encode error:", e)
+
+    def _on_frame(self, frame_idx, small):
+        ok, jpg = cv2.imencode(".jpg", small, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            self.pre_roll.append((frame_idx, jpg))
+        clip = self.active
+        if clip is None:
+            return
+        if clip['last'] != frame_idx:
+            self.write_q.put(('frame', clip, [(frame_idx, small)]))
+            clip['last'] = frame_idx
+            clip['count'] += 1
+        clip['remaining'] -= 1
+        if clip['remaining'] <= 0:
+            self._finish()
+        elif clip['count'] >= self.max_frames:
+            # Busy road: seal this clip and carry the post-roll over into a new one
+            remaining = clip['remaining']
+            self._finish()
+            event = dict(clip['events'][-1], frame=frame_idx, ts=time.time(), continued=True)
+            self._open(event, [])
+            self.active['remaining'] = remaining
+
+    def _on_trigger(self, event):
+        if self.active is not None:
+            self.active['events'].append(event)
+            self.active['remaining'] = self.post_frames
+            return
+        self._open(event, list(self.pre_roll))
+
+    def _open(self, event, frames):
+        self.active = {'events': [event], 'remaining': self.post_frames, 'count': len(frames),
+                       'last': frames[-1][0] if frames else None}
+        self.write_q.put(('open', self.active, frames))
+
+    def _finish(self):
+        self.write_q.put(('close', self.active, None))
+        self.active = None
+
+    # -- background writer --
+
+    def _writer_loop(self):
+        while True:
+            msg = self.write_q.get()
+            if msg is None:
+                return
+            op, clip, frames = msg
+            try:
+                if op == 'open':
+                    first = clip['events'][0]
+                    clip['stem'] = (time.strftime("%Y%m%d_%H%M%S", time.localtime(first['ts']))
+                                    + f"_{first['label']}_f{first['frame']}")
+                    clip['writer'] = None
+                if frames:
+                    self._write_frames(clip, frames)
+                if op == 'close':
+                    self._close_clip(clip)
+                    self._enforce_budget()
+            except Exception as e:
+                print("Clip write error:", e)
+
+    def _write_frames(self, clip, frames):
+        for idx, img in frames:
+            if img.ndim == 1:  # JPEG from the pre-roll ring
+                img = cv2.imdecode(img, cv2.IMREAD_COLOR)
+            if clip['writer'] is None:
+                h, w = img.shape[:2]
+                path = os.path.join(self.out_dir, clip['stem'] + ".mp4")
+                clip['writer'] = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*FOURCC), self.fps, (w, h))
+                clip['first'] = idx
+            clip['writer'].write(img)
+            clip['last_written'] = idx
+
+    def _close_clip(self, clip):
+        if clip['writer'] is None:
+            return  # no frames (e.g. closed right after a split)
+        clip['writer'].release()
+        with open(os.path.join(self.out_dir, clip['stem'] + ".json"), "w") as f:
+            json.dump({'video': clip['stem'] + ".mp4", 'fps': self.fps, 'scale': self.scale,
+                       'frame_first': clip['first'], 'frame_last': clip['last_written'],
+                       'events': clip['events']}, f, indent=1)
+        self.clips_written += 1
+
+    def _enforce_budget(self):
+        clips = {}
+        for name in os.listdir(self.out_dir):
+            stem, ext = os.path.splitext(name)
+            if ext in (".mp4", ".json"):
+                path = os.path.join(self.out_dir, name)
+                entry = clips.setdefault(stem, [0, os.path.getmtime(path), []])
+                entry[0] += os.path.getsize(path)
+                entry[2].append(path)
+        total = sum(c[0] for c in clips.values())
+        for stem, (size, _, paths) in sorted(clips.items(), key=lambda it: it[1][1]):
+            if total <= self.budget or len(clips) <= 1:
+                break
+            for p in paths:
+                os.remove(p)
+            del clips[stem]
+            total -= size
+            self.clips_evicted += 1
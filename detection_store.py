@@ -0,0 +1,161 @@
+"""
+detection_store.py
+Append-only columnar log of per-frame detections and track lifecycle records.
+
+Layout (one directory per run):
+    <root>/<table>/<chunk>/<column>.npy   one file per column per chunk
+    <root>/<table>/index.json             zone map per chunk (frame/t ranges, max area)
+
+Chunks are written once and never modified. Range queries prune chunks with
+the zone map, then memory-map only the columns they need.
+"""
+
+import json
+import os
+
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+CHUNK_ROWS = 4096
+# -----------------------
+
+TABLES = {
+    'detections': [('frame', '<i8'), ('t', '<f8'), ('kind', 'u1'), ('x', '<i4'), ('y', '<i4'), ('w', '<i4'),
+                   ('h', '<i4'), ('area', '<f4'), ('mean_int', '<f4')],
+    'tracks': [('track_id', '<i8'), ('event', 'u1'), ('kind', 'u1'), ('frame', '<i8'), ('t', '<f8'), ('x', '<i4'),
+               ('y', '<i4'), ('w', '<i4'), ('h', '<i4'), ('area', '<f4'), ('consecutive', '<i4')],
+}
+TRACK_EVENTS = {'created': 0, 'confirmed': 1, 'lost': 2}
+KIND_CODES = {'pothole': 0, 'puddle': 1, 'bump': 2}
+
+
+class DetectionStore:
+    """Buffered writer + chunk-pruning reader for one run directory"""
+
+    def __init__(self, root):
+        self.root = root
+        self.buffers = {name: {col: [] for col, _ in cols} for name, cols in TABLES.items()}
+        self.index = {}
+        for name in TABLES:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+            path = self._index_path(name)
+            if os.path.exists(path):
+                with open(path) as f:
+                    self.index[name] = json.load(f)
+            else:
+                self.index[name] = []
+
+    def _index_path(self, table):
+        return os.path.join(self.root, table, "index.json")
+
+    # -- writing --
+
+    def _append(self, table, row):
+        buf = self.buffers[table]
+        for col, _ in TABLES[table]:
+            buf[col].append(row[col])
+        if len(buf['frame']) >= CHUNK_ROWS:
+            self._flush_table(table)
+
+    def append_detections(self, frame_idx, t, detections):
+        for (x, y, w, h, area, mean_int, kind) in detections:
+            self._append('detections', {'frame': frame_idx, 't': t, 'kind': KIND_CODES[kind],
+                                        'x': x, 'y': y, 'w': w, 'h': h, 'area': area, 'mean_int': mean_int})
+
+    def append_track(self, event, track_id, frame_idx, t, tdata):
+        x, y, w, h = tdata['bbox']
+        self._append('tracks', {'track_id': track_id, 'event': TRACK_EVENTS[event],
+                                'kind': KIND_CODES[tdata['kind']], 'frame': frame_idx, 't': t,
+                                'x': x, 'y': y, 'w': w, 'h': h, 'area': tdata.get('area', 0.0),
+                                'consecutive': tdata['consecutive']})
+
+    def _flush_table(self, table):
+        buf = self.buffers[table]
+        n = len(buf['frame'])
+        if not n:
+            return
+        chunk = f"{len(self.index[table]):06d}"
+        chunk_dir = os.path.join(self.root, table, chunk)
+        os.makedirs(chunk_dir, exist_ok=True)
+        cols = {}
+        for col, dtype in TABLES[table]:
+            cols[col] = np.asarray(buf[col], dtype=dtype)
+            np.save(os.path.join(chunk_dir, col + ".npy"), cols[col])
+            buf[col].clear()
+
+        self.index[table].append({
+            'chunk': chunk, 'rows': n,
+            'frame_min': int(cols['frame'].min()), 'frame_max': int(cols['frame'].max()),
+            't_min': float(cols['t'].min()), 't_max': float(cols['t'].max()),
+            'area_max': float(cols['area'].max()),
+        })
+        tmp = self._index_path(table) + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.index[table], f)
+        os.replace(tmp, self._index_path(table))
+
+    def flush(self):
+        for table in TABLES:
+            self._flush_table(table)
+
+    def close(self):
+        self.flush()
+
+    # -- reading --
+
+    def query(self, table, t0=None, t1=None, frame0=None, frame1=None, min_area=None,
+              event=None, kind=None, columns=None):
+        """Rows matching all given bounds (inclusive) as {column: ndarray}"""
+        columns = columns or [col for col, _ in TABLES[table]]
+        needed = set(columns)
+        for col, bound in (('t', (t0, t1)), ('frame', (frame0, frame1)), ('area', (min_area,)),
+                           ('event', (event,)), ('kind', (kind,))):
+            if any(b is not None for b in bound):
+                needed.add(col)
+
+        parts = {col: [] for col in columns}
+        for meta in self.index[table]:
+            if t0 is not None and meta['t_max'] < t0:
+                continue
+            if t1 is not None and meta['t_min'] > t1:
+                continue
+            if frame0 is not None and meta['frame_max'] < frame0:
+                continue
+            if frame1 is not None and meta['frame_min'] > frame1:
+                continue
+            if min_area is not None and meta['area_max'] < min_area:
+                continue
+
+            chunk_dir = os.path.join(self.root, table, meta['chunk'])
+            data = {col: np.load(os.path.join(chunk_dir, col + ".npy"), mmap_mode='r') for col in needed}
+            mask = np.ones(meta['rows'], dtype=bool)
+            if t0 is not None:
+                mask &= data['t'] >= t0
+            if t1 is not None:
+                mask &= data['t'] <= t1
+            if frame0 is not None:
+                mask &= data['frame'] >= frame0
+            if frame1 is not None:
+                mask &= data['frame'] <= frame1
+            if min_area is not None:
+                mask &= data['area'] >= min_area
+            if event is not None:
+                mask &= data['event'] == TRACK_EVENTS[event]
+            if kind is not None:
+                mask &= data['kind'] == KIND_CODES[kind]
+            for col in columns:
+                parts[col].append(np.asarray(data[col][mask]))
+
+        dtypes = dict(TABLES[table])
+        return {col: np.concatenate(p) if p else np.empty(0, dtype=dtypes[col]) for col, p in parts.items()}
+
+    def confirmations(self, t0=None, t1=None, kind='pothole'):
+        """All confirmations of `kind` between t0 and t1 (seconds)"""
+        return self.query('tracks', t0=t0, t1=t1, event='confirmed', kind=kind)
+
+    def tracks_with_area(self, min_area):
+        """Ids of tracks with any lifecycle record whose contour area is at least min_area"""
+        rows = self.query('tracks', min_area=min_area, columns=['track_id'])
+        return np.unique(rows['track_id'])
@@ -0,0 +1,410 @@
+"""
+fleet_uploader.py
+Store-and-forward upload of detection events to the fleet backend.
+
+enqueue() never blocks: events go onto a bounded in-memory queue and a
+background thread appends them to a durable on-disk spool (JSON-lines
+segments, fsynced on rotation). A sender thread takes the oldest sealed
+segment, gzips it as one batch and POSTs it over a kept-alive
+http.client connection. A segment is deleted only after a 2xx, so events
+survive crashes and dead zones; failures back off exponentially (with
+jitter) up to BACKOFF_MAX_SEC. Each event carries an event_id: the client
+drops ids it has already spooled and the server ignores ids it has already
+stored, so retries after an ambiguous failure are harmless. A segment the
+server rejects with a 4xx, or answers with an error MAX_ATTEMPTS times in a
+row, is moved to quarantine/ so it cannot hold up the segments behind it
+(connection failures only back off: the vehicle is offline, the batch is
+fine). The sender claims a segment by renaming it to .sending before reading
+it, so the disk budget never removes a batch that is in flight. Sending is
+paced by a token bucket (BANDWIDTH_BPS) and the spool, quarantine/ included,
+is capped at DISK_BUDGET_MB by dropping quarantined and then the oldest
+sealed segments.
+
+Local stand-in for the backend (dedupes and appends to a JSON-lines file):
+
+    python fleet_uploader.py serve [--port 8770] [--fail-rate 0.3]
+"""
+
+import gzip
+import http.client
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+# -----------------------
+# Configuration
+# -----------------------
+ENDPOINT = "http://127.0.0.1:8770/events"
+SPOOL_DIR = "upload_spool"
+SEGMENT_MAX_EVENTS = 200
+SEGMENT_MAX_AGE_SEC = 5.0      # seal a partly filled segment after this long
+QUEUE_SIZE = 1024
+BANDWIDTH_BPS = 16 * 1024      # compressed bytes per second
+DISK_BUDGET_MB = 50
+BACKOFF_MIN_SEC = 1.0
+BACKOFF_MAX_SEC = 60.0
+TIMEOUT_SEC = 10.0
+MAX_ATTEMPTS = 20              # consecutive server errors before a segment is quarantined
+RECENT_IDS = 4096              # client-side duplicate window
+# -----------------------
+
+
+class TokenBucket:
+    """Bytes-per-second pacing; wait(n) sleeps until n bytes may be sent"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.t = time.monotonic()
+
+    def wait(self, n, stop_evt):
+        while not stop_evt.is_set():
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+            self.t = now
+            if self.tokens >= min(n, self.capacity):
+                self.tokens -= n  # may go negative for batches larger than the burst
+                return True
+            stop_evt.wait((min(n, self.capacity) - self.tokens) / self.rate)
+        return False
+
+
+class FleetUploader:
+    """Durable spool + background batch sender"""
+
+    def __init__(self, endpoint=ENDPOINT, spool_dir=SPOOL_DIR, vehicle_id=None):
+        url = urlsplit(endpoint)
+        self.scheme, self.netloc, self.path = url.scheme, url.netloc, url.path or "/"
+        self.spool_dir = spool_dir
+        self.vehicle_id = vehicle_id
+        self.q = queue.Queue(maxsize=QUEUE_SIZE)
+        self.stop_evt = threading.Event()
+        self.bucket = TokenBucket(BANDWIDTH_BPS, burst=BANDWIDTH_BPS * 4)
+        self.recent = OrderedDict()
+        self.conn = None
+        self.stats = {'enqueued': 0, 'duplicates': 0, 'dropped_queue': 0, 'dropped_disk': 0,
+                      'sent_events': 0, 'sent_bytes': 0, 'batches': 0, 'failures': 0, 'quarantined': 0}
+        self.quarantine_dir = os.path.join(spool_dir, "quarantine")
+        os.makedirs(self.quarantine_dir, exist_ok=True)
+        # Anything left open or in flight by a previous run is sealed and sent first
+        for name in os.listdir(spool_dir):
+            if name.endswith(".open"):
+                self._recover(os.path.join(spool_dir, name))
+            elif name.endswith(".sending"):
+                os.replace(os.path.join(spool_dir, name), os.path.join(spool_dir, name[:-8] + ".jsonl"))
+        names = os.listdir(spool_dir) + os.listdir(self.quarantine_dir)
+        self.seq = max([self._seg_no(n) for n in names] + [0])
+        self.threads = [threading.Thread(target=self._spool_loop, daemon=True),
+                        threading.Thread(target=self._send_loop, daemon=True)]
+
+    @staticmethod
+    def _recover(path):
+        """Seal a segment from a crashed run, dropping a partly written last line"""
+        with open(path, "rb+") as f:
+            data = f.read()
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+        if end:
+            os.replace(path, path[:-5] + ".jsonl")
+        else:
+            os.remove(path)
+
+    @staticmethod
+    def _seg_no(name):
+        try:
+            return int(name.split(".")[0])
+        except ValueError:
+            return 0
+
+    def start(self):
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush the in-memory queue to disk; unsent segments stay spooled for next time"""
+        self.q.put(None)
+        self.threads[0].join(timeout)
+        self.stop_evt.set()
+        self.threads[1].join(timeout)
+        if self.conn:
+            self.conn.close()
+
+    # -- producer side --
+
+    def enqueue(self, event):
+        """Queue one event dict (must carry 'event_id'); never blocks"""
+        if self.vehicle_id and 'vehicle_id' not in event:
+            event = dict(event, vehicle_id=self.vehicle_id)
+        try:
+            self.q.put_nowait(event)
+            return True
+        except queue.Full:
+            self.stats['dropped_queue'] += 1
+            return False
+
+    # -- spool --
+
+    @staticmethod
+    def _listdir(path):
+        try:
+            return os.listdir(path)
+        except FileNotFoundError:
+            return []
+
+    def _sealed(self):
+        return sorted((n for n in self._listdir(self.spool_dir) if n.endswith(".jsonl")), key=self._seg_no)
+
+    def _enforce_disk_budget(self):
+        """Drop quarantined, then the oldest sealed segments; the claimed .sending one is never touched"""
+        budget = DISK_BUDGET_MB * 1024 * 1024
+        quarantined = sorted((os.path.join(self.quarantine_dir, n) for n in self._listdir(self.quarantine_dir)),
+                             key=lambda p: self._seg_no(os.path.basename(p)))
+        sealed = [os.path.join(self.spool_dir, n) for n in self._sealed()]
+        sending = [os.path.join(self.spool_dir, n) for n in self._listdir(self.spool_dir) if n.endswith(".sending")]
+        sizes = {}
+        for path in quarantined + sealed + sending:
+            try:
+                sizes[path] = os.path.getsize(path)
+            except FileNotFoundError:  # sent or quarantined meanwhile
+                pass
+        total = sum(sizes.values())
+        for path in quarantined + sealed:
+            if total <= budget:
+                break
+            if path not in sizes:
+                continue
+            try:
+                with open(path) as f:
+                    lines = sum(1 for _ in f)
+                os.remove(path)
+            except FileNotFoundError:  # claimed by the sender after the listing
+                continue
+            self.stats['dropped_disk'] += lines
+            total -= sizes[path]
+
+    def _spool_loop(self):
+        f, path, count, opened = None, None, 0, 0.0
+
+        def seal():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            os.replace(path, path[:-5] + ".jsonl")
+            self._enforce_disk_budget()
+
+        while True:
+            try:
+                event = self.q.get(timeout=0.5)
+            except queue.Empty:
+                event = False
+            if event:
+                eid = event.get('event_id')
+                if eid in self.recent:
+                    self.stats['duplicates'] += 1
+                else:
+                    if eid is not None:
+                        self.recent[eid] = True
+                        if len(self.recent) > RECENT_IDS:
+                            self.recent.popitem(last=False)
+                    if f is None:
+                        self.seq += 1
+                        path = os.path.join(self.spool_dir, f"{self.seq:08d}.open")
+                        f, count, opened = open(path, "a"), 0, time.monotonic()
+                    f.write(json.dumps(event, separators=(",", ":")) + "\n")
+                    f.flush()
+                    count += 1
+                    self.stats['enqueued'] += 1
+            if f is not None and (event is None or count >= SEGMENT_MAX_EVENTS
+                                  or time.monotonic() - opened >= SEGMENT_MAX_AGE_SEC):
+                seal()
+                f = None
+            if event is None:
+                return
+
+    # -- sender --
+
+    def _connection(self):
+        if self.conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self.conn = cls(self.netloc, timeout=TIMEOUT_SEC)
+        return self.conn
+
+    def _post(self, body, batch_id):
+        """HTTP status, or None when the request did not complete"""
+        conn = self._connection()
+        try:
+            conn.request("POST", self.path, body=body, headers={
+                'Content-Type': 'application/x-ndjson', 'Content-Encoding': 'gzip', 'X-Batch-Id': batch_id})
+            resp = conn.getresponse()
+            resp.read()  # drain so the connection can be reused
+            if resp.getheader("Connection", "").lower() == "close":
+                conn.close()
+                self.conn = None
+            return resp.status
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.conn = None
+            return None
+
+    def _quarantine(self, path, reason):
+        name = os.path.basename(path).rsplit(".", 1)[0] + ".jsonl"
+        try:
+            os.replace(path, os.path.join(self.quarantine_dir, name))
+        except FileNotFoundError:
+            return
+        self.stats['quarantined'] += 1
+        print(f"[uploader] segment {name} quarantined ({reason})")
+
+    def _claim(self):
+        """Rename the oldest sealed segment to .sending; None if there is none"""
+        for name in self._sealed():
+            path = os.path.join(self.spool_dir, name[:-6] + ".sending")
+            try:
+                os.replace(os.path.join(self.spool_dir, name), path)
+            except FileNotFoundError:  # dropped by the disk budget
+                continue
+            return path
+        return None
+
+    def _send_loop(self):
+        backoff = BACKOFF_MIN_SEC
+        attempts = 0
+        path = None  # claimed segment, kept across retries
+        while not self.stop_evt.is_set():
+            if path is None:
+                path = self._claim()
+            if path is None:
+                self.stop_evt.wait(0.5)
+                continue
+            with open(path, "rb") as f:
+                raw = f.read()
+            body = gzip.compress(raw)
+            if not self.bucket.wait(len(body), self.stop_evt):
+                break
+            batch_id = os.path.basename(path)[:-8] + ".jsonl"
+            status = self._post(body, batch_id)
+            if status is not None and 200 <= status < 300:
+                os.remove(path)
+                path = None
+                self.stats['batches'] += 1
+                self.stats['sent_events'] += raw.count(b"\n")
+                self.stats['sent_bytes'] += len(body)
+                backoff = BACKOFF_MIN_SEC
+                attempts = 0
+                continue
+            self.stats['failures'] += 1
+            if status is not None:
+                attempts += 1  # the server answered; being offline is not the segment's fault
+            if status is not None and 400 <= status < 500 and status not in (408, 429):
+                self._quarantine(path, f"HTTP {status}")  # retrying will not change the answer
+            elif attempts >= MAX_ATTEMPTS:
+                self._quarantine(path, f"{attempts} failed attempts")
+            else:
+                self.stop_evt.wait(backoff * random.uniform(0.5, 1.0))
+                backoff = min(BACKOFF_MAX_SEC, backoff * 2)
+                continue
+            path = None
+            attempts = 0
+        if path is not None:  # unclaim, so the next run (or the disk budget) sees it as sealed again
+            os.replace(path, path[:-8] + ".jsonl")
+
+    def pending_segments(self):
+        return len(self._sealed()) + sum(1 for n in self._listdir(self.spool_dir) if n.endswith(".sending"))
+
+
+# -----------------------
+# Local stand-in server
+# -----------------------
+
+def serve(host="127.0.0.1", port=8770, out_path="fleet_events.jsonl", fail_rate=0.0):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    seen = set()
+    if os.path.exists(out_path):
+        with open(out_path) as f:
+            for line in f:
+                try:
+                    seen.add(json.loads(line).get('event_id'))
+                except ValueError:
+                    pass
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so the client can reuse its connection
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if random.random() < fail_rate:
+                self._reply(503, {'error': 'simulated outage'})
+                return
+            if self.headers.get("Content-Encoding") == "gzip":
+                try:
+                    body = gzip.decompress(body)
+                except (OSError, EOFError):
+                    self._reply(400, {'error': 'bad gzip body'})
+                    return
+            accepted = duplicates = malformed = 0
+            with lock, open(out_path, "a") as out:
+                for line in body.decode(errors="replace").splitlines():
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        malformed += 1
+                        continue
+                    if not isinstance(event, dict):
+                        malformed += 1
+                        continue
+                    eid = event.get('event_id')
+                    if eid in seen:
+                        duplicates += 1
+                        continue
+                    seen.add(eid)
+                    out.write(line + "\n")
+                    accepted += 1
+            print(f"batch {self.headers.get('X-Batch-Id')}: {accepted} accepted, {duplicates} duplicate, "
+                  f"{malformed} malformed")
+            self._reply(200, {'accepted': accepted, 'duplicates': duplicates, 'malformed': malformed})
+
+        def _reply(self, status, obj):
+            data = json.dumps(obj).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Local stand-in for the fleet event backend")
+    ap.add_argument("command", choices=["serve"])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8770)
+    ap.add_argument("--out", default="fleet_events.jsonl")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="fraction of batches answered with 503")
+    args = ap.parse_args()
+    server = serve(args.host, args.port, args.out, args.fail_rate)
+    print(f"Fleet stand-in listening on http://{args.host}:{args.port}/events -> {args.out}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
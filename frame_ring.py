@@ -0,0 +1,273 @@
+"""
+frame_ring.py
+Zero-copy frame ring in shared memory, for capture and analysis in separate
+processes without pickling frames through a queue.
+
+Layout of the shared block:
+    int64 header: magic, slots, height, width, channels, write_seq
+    int64 reader cursors (MAX_READERS), last sequence each reader consumed
+    int64 slot sequence numbers (slots), 0 while a slot is being written
+    slot data: slots x (height, width, channels) uint8
+
+Capture decodes straight into a slot (claim/commit), so a frame is written
+once. Readers get a NumPy view of the slot, not a copy. The writer never
+waits for readers; a reader that falls within READ_MARGIN slots of being
+lapped skips ahead to the newest frame, so it is not racing the writer for
+the slot it reads. valid(seq) tells it whether the slot was overwritten while
+it worked, so a consumer reads the slot once into its own buffers and then
+checks. Only a consumer that has to hold on to a frame asks next() for
+copy=True, which copies it out and drops and retries a torn copy.
+
+    python frame_ring.py pothole_road_sample1.mp4
+"""
+
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+SLOTS = 8
+MAX_READERS = 4
+POLL_SEC = 0.001
+READ_MARGIN = 2     # slots kept between a reader and the writer's next claim
+# -----------------------
+
+MAGIC = 0x46524D52  # 'FRMR'
+META = 6
+_SLOTS, _H, _W, _C, _WSEQ = 1, 2, 3, 4, 5
+
+
+class FrameRing:
+    """Preallocated frame slots in a named shared-memory block"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        meta = np.ndarray((META,), dtype=np.int64, buffer=shm.buf)
+        if meta[0] != MAGIC:
+            raise ValueError(f"shared memory {shm.name!r} is not a frame ring")
+        self.slots = int(meta[_SLOTS])
+        self.shape = (int(meta[_H]), int(meta[_W]), int(meta[_C]))
+        n_hdr = META + MAX_READERS + self.slots
+        self.header = np.ndarray((n_hdr,), dtype=np.int64, buffer=shm.buf)
+        self.cursors = self.header[META:META + MAX_READERS]
+        self.slot_seq = self.header[META + MAX_READERS:]
+        self.data = np.ndarray((self.slots,) + self.shape, dtype=np.uint8, buffer=shm.buf, offset=n_hdr * 8)
+
+    @classmethod
+    def create(cls, name, shape, slots=SLOTS):
+        if len(shape) == 2:
+            shape = (shape[0], shape[1], 1)
+        n_hdr = META + MAX_READERS + slots
+        size = n_hdr * 8 + slots * int(np.prod(shape))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((n_hdr,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[:META] = (MAGIC, slots, shape[0], shape[1], shape[2], 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def write_seq(self):
+        return int(self.header[_WSEQ])
+
+    # -- writer --
+
+    def claim(self):
+        """(seq, view) of the next slot; fill the view in place, then commit(seq)"""
+        seq = self.write_seq + 1
+        slot = seq % self.slots
+        self.slot_seq[slot] = 0  # readers holding the old frame see it as invalid
+        view = self.data[slot]
+        return seq, view[:, :, 0] if self.shape[2] == 1 else view
+
+    def commit(self, seq):
+        self.slot_seq[seq % self.slots] = seq
+        self.header[_WSEQ] = seq
+
+    def write(self, frame):
+        """Copy one frame in (when it was not decoded in place); returns its seq"""
+        seq, view = self.claim()
+        view[...] = frame
+        self.commit(seq)
+        return seq
+
+    def read_into(self, cap):
+        """Decode cap's next frame directly into a slot; returns seq or None"""
+        seq, view = self.claim()
+        ok, out = cap.read(view)
+        if not ok:
+            return None
+        if out is not None and not np.shares_memory(out, view):
+            view[...] = out  # backend reallocated (size/format mismatch); fall back to one copy
+        self.commit(seq)
+        return seq
+
+    def min_cursor(self, n_readers):
+        return int(self.cursors[:n_readers].min()) if n_readers else self.write_seq
+
+    # -- reader side --
+
+    def view(self, seq):
+        """View of frame seq, or None if it was already overwritten"""
+        slot = seq % self.slots
+        if seq <= 0 or self.slot_seq[slot] != seq:
+            return None
+        view = self.data[slot]
+        return view[:, :, 0] if self.shape[2] == 1 else view
+
+    def valid(self, seq):
+        """True while frame seq is still in its slot (check after using a view)"""
+        return seq > 0 and self.slot_seq[seq % self.slots] == seq
+
+    def close(self):
+        # Drop our views before closing the mapping
+        self.header = self.cursors = self.slot_seq = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RingReader:
+    """One consumer's cursor into a FrameRing"""
+
+    def __init__(self, ring, reader_id):
+        if not 0 <= reader_id < MAX_READERS:
+            raise ValueError(f"reader_id must be in [0, {MAX_READERS})")
+        self.ring = ring
+        self.reader_id = reader_id
+        self.dropped = 0
+        self.torn = 0     # frames overwritten while being read (copy=True, or counted by the consumer)
+        self.buf = None
+
+    @property
+    def cursor(self):
+        return int(self.ring.cursors[self.reader_id])
+
+    def next(self, timeout=1.0, latest_only=False, copy=False):
+        """(seq, frame) of the next unread frame, or None on timeout.
+
+        The frame is a view into the ring unless copy=True, in which case it is
+        a reader-owned buffer (reused between calls) checked after the copy.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            head = self.ring.write_seq
+            cur = self.cursor
+            if head > cur:
+                seq = head if latest_only else cur + 1
+                if seq < head - self.ring.slots + 1 + READ_MARGIN:
+                    seq = head  # (nearly) lapped: skip to the newest frame, furthest from the writer
+                self.dropped += seq - cur - 1
+                view = self.ring.view(seq)
+                self.ring.cursors[self.reader_id] = seq
+                if view is None:
+                    self.dropped += 1
+                    continue
+                if not copy:
+                    return seq, view
+                if self.buf is None:
+                    self.buf = np.empty_like(view)
+                np.copyto(self.buf, view)
+                if self.ring.valid(seq):
+                    return seq, self.buf
+                self.torn += 1  # overwritten mid-copy: drop it and take the next one
+                self.dropped += 1
+                continue
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(POLL_SEC)
+
+    def valid(self, seq):
+        return self.ring.valid(seq)
+
+
+def _pothole_consumer(ring_name, reader_id, width, height, stop_evt):
+    from pothole_detector import PotholeDetector
+    ring = FrameRing.attach(ring_name)
+    reader = RingReader(ring, reader_id)
+    detector = PotholeDetector(width, height)
+    while not stop_evt.is_set():
+        item = reader.next(timeout=0.5)
+        if item is None:
+            continue
+        seq, view = item
+        # Only prepare() reads the slot (the ROI crop + cvtColor already make new
+        # buffers); check the slot afterwards so a torn frame never reaches MOG2
+        gray_eq, edges = detector.prepare(view)
+        if not reader.valid(seq):
+            reader.torn += 1
+            reader.dropped += 1
+            continue
+        fg = detector.clean_fg(detector.bg_sub.apply(gray_eq))
+        _, confirmed = detector.process_prepared(gray_eq, fg, edges)
+        for tid, tdata in confirmed:
+            print(f"[detector] Confirmed {tdata['kind']} id={tid} at frame {seq}")
+    print(f"[detector] frames={detector.frame_idx} dropped={reader.dropped} torn={reader.torn}")
+    ring.close()
+
+
+def _luma_consumer(ring_name, reader_id, stop_evt):
+    ring = FrameRing.attach(ring_name)
+    reader = RingReader(ring, reader_id)
+    n, total = 0, 0.0
+    while not stop_evt.is_set():
+        item = reader.next(timeout=0.5, latest_only=True)
+        if item is None:
+            continue
+        total += float(item[1][::8, ::8].mean())
+        n += 1
+    print(f"[luma] frames={n} mean={total / max(n, 1):.1f} dropped={reader.dropped}")
+    ring.close()
+
+
+def main():
+    import multiprocessing as mp
+    import cv2
+
+    video = sys.argv[1] if len(sys.argv) > 1 else "pothole_road_sample1.mp4"
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open {video}")
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    ring = FrameRing.create(f"frame_ring_{mp.current_process().pid}", (h, w, 3))
+    stop_evt = mp.Event()
+    procs = [mp.Process(target=_pothole_consumer, args=(ring.name, 0, w, h, stop_evt)),
+             mp.Process(target=_luma_consumer, args=(ring.name, 1, stop_evt))]
+    for p in procs:
+        p.start()
+
+    frames = 0
+    next_t = time.monotonic()
+    try:
+        while ring.read_into(cap) is not None:
+            frames += 1
+            next_t += 1.0 / fps
+            time.sleep(max(0.0, next_t - time.monotonic()))
+        time.sleep(0.5)  # let readers drain the last slots
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+    finally:
+        stop_evt.set()
+        for p in procs:
+            p.join()
+        cap.release()
+        print(f"[capture] frames written={frames}")
+        ring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+lean_capture.py
+Capture wrapper that only pays for frames that are used.
+
+Skipped frames are only grab()bed: the backend advances without the
+retrieve() step (colour conversion and copy out; for V4L2/MSMF cameras also
+the decode). With luma=True the backend is asked for its native frames
+(CAP_PROP_CONVERT_RGB=0) and the Y plane is handed out directly, so
+grayscale consumers skip the YUV -> BGR -> gray round trip. Backends that
+still return BGR fall back to a single cvtColor. The Y plane is close to,
+not equal to, cvtColor gray (about 1-1.4 levels brighter on the sample clips
+even after the range expansion), so consumers tuned on BGR input, like the
+pothole detector, do not give the same results on it.
+
+    cap = LeanCapture(cv2.VideoCapture(path), skip=3, luma=True)
+    ok, gray = cap.read()   # every 3rd frame, single channel
+"""
+
+import cv2
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+EXPAND_LIMITED_RANGE = True  # codec/camera Y is 16-235; stretch to 0-255 like cvtColor gray
+# -----------------------
+
+_LIMITED_TO_FULL = np.clip((np.arange(256) - 16) * 255 / 219.0 + 0.5, 0, 255).astype(np.uint8)
+
+
+class LeanCapture:
+    """cv2.VideoCapture front-end with grab()-only skipping and optional luma-only output"""
+
+    def __init__(self, source, skip=1, luma=False):
+        self.cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.skip = max(1, int(skip))
+        self.luma = luma
+        self.layout = None  # native frame layout, decided on the first retrieve
+        self.frame_idx = 0  # frames consumed from the source, skipped ones included
+        self.grabbed_only = 0
+        self.retrieved = 0
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) if self.cap.isOpened() else 0
+        if luma and self.cap.isOpened():
+            if not self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+                self.layout = 'bgr'
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def set(self, prop, value):
+        return self.cap.set(prop, value)
+
+    def set_skip(self, skip):
+        self.skip = max(1, int(skip))
+
+    def release(self):
+        self.cap.release()
+
+    def _to_luma(self, frame):
+        h = self.height or frame.shape[0]
+        if self.layout is None:
+            if frame.ndim == 2 and frame.shape[0] == h:
+                self.layout = 'y'          # planar YUV, first plane exposed
+            elif frame.ndim == 2 and frame.shape[0] == h * 3 // 2:
+                self.layout = 'yuv420'     # I420 / NV12 stacked planes
+            elif frame.ndim == 3 and frame.shape[2] == 2:
+                self.layout = 'yuyv'       # packed 4:2:2
+            else:
+                self.layout = 'bgr'
+                self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        if self.layout == 'bgr':
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if self.layout == 'yuv420':
+            y = frame[:h]
+        elif self.layout == 'yuyv':
+            y = frame[:, :, 0]
+        else:
+            y = frame
+        return cv2.LUT(y, _LIMITED_TO_FULL) if EXPAND_LIMITED_RANGE else np.ascontiguousarray(y)
+
+    def read(self):
+        """(ok, frame) for the next used frame; the skip-1 frames before it are only grabbed"""
+        for _ in range(self.skip - 1):
+            if not self.cap.grab():
+                return False, None
+            self.frame_idx += 1
+            self.grabbed_only += 1
+        if not self.cap.grab():
+            return False, None
+        self.frame_idx += 1
+        if self.luma and self.layout != 'bgr':
+            # FFmpeg warns on every native yuv420p retrieve that it hands out 8UC1, which is what we
+            # asked for; quieten OpenCV's log for this call only
+            level = cv2.utils.logging.getLogLevel()
+            cv2.utils.logging.setLogLevel(cv2.utils.logging.LOG_LEVEL_ERROR)
+            try:
+                ok, frame = self.cap.retrieve()
+            finally:
+                cv2.utils.logging.setLogLevel(level)
+        else:
+            ok, frame = self.cap.retrieve()
+        if not ok or frame is None:
+            return False, None
+        self.retrieved += 1
+        return True, (self._to_luma(frame) if self.luma else frame)
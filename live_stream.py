@@ -0,0 +1,227 @@
+"""
+live_stream.py
+Local asyncio server that pushes the real detector output to the dashboard
+(nura-spring-dynamics/live-cam.html):
+
+    GET /events      -> text/event-stream of confirmed-detection events (JSON)
+    GET /stream.mjpg -> annotated frames as MJPEG, quality adapted to a bitrate target
+    GET /stats       -> JSON counters
+
+The detection loop only hands over a frame reference / event dict. JPEG
+encoding runs on its own thread and fan-out runs on the server's event loop.
+Each client holds just the newest frame, so a slow client drops frames
+instead of slowing anyone else down.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import cv2
+
+# -----------------------
+# Configuration
+# -----------------------
+HOST = "127.0.0.1"
+PORT = 8766
+MJPEG_MAX_FPS = 10
+MJPEG_MAX_WIDTH = 640
+TARGET_KBPS = 1500        # per-stream budget the JPEG quality is steered towards
+JPEG_QUALITY_START = 70
+JPEG_QUALITY_MIN = 25
+JPEG_QUALITY_MAX = 85
+EVENT_QUEUE_SIZE = 64
+# -----------------------
+
+BOUNDARY = b"frame"
+
+
+class LiveStream:
+    """Background SSE + MJPEG server; publish_* are safe to call from the hot loop"""
+
+    def __init__(self, host=HOST, port=PORT):
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.event_clients = set()   # asyncio.Queue per /events client
+        self.frame_clients = []      # {'jpg', 'ready', 'dropped'} per /stream.mjpg client
+        self.quality = JPEG_QUALITY_START
+        self.stats = {'events': 0, 'frames_encoded': 0, 'frames_dropped': 0, 'clients': 0}
+        self._latest = None
+        self._frame_ready = threading.Event()
+        self._stop = threading.Event()
+
+    # -- producer side (detection thread) --
+
+    def publish_event(self, event):
+        """Queue a detection event for every /events client (non-blocking)"""
+        if self.loop is None:
+            return
+        data = json.dumps(event).encode()
+        self.loop.call_soon_threadsafe(self._fanout_event, data)
+
+    def publish_frame(self, frame):
+        """Offer an annotated frame; only a reference is kept (do not mutate it afterwards)"""
+        if self.frame_clients:
+            self._latest = frame
+            self._frame_ready.set()
+
+    # -- lifecycle --
+
+    def start(self):
+        """Bind and serve in the background; raises OSError if the port cannot be bound"""
+        ready = threading.Event()
+        errors = []
+        threading.Thread(target=self._run_loop, args=(ready, errors), daemon=True).start()
+        if not ready.wait(5):
+            errors.append(TimeoutError(f"live stream did not start on {self.host}:{self.port}"))
+        if errors:
+            self.stop()
+            raise errors[0]
+        threading.Thread(target=self._encoder, daemon=True).start()
+        print(f"Live stream on http://{self.host}:{self.port} (/events, /stream.mjpg)")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._frame_ready.set()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def _run_loop(self, ready, errors):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        except OSError as e:
+            errors.append(e)
+            loop.close()
+            ready.set()
+            return
+        self.loop = loop  # publish_* only queue work once the server is up
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+
+    # -- encoder thread --
+
+    def _encoder(self):
+        min_interval = 1.0 / MJPEG_MAX_FPS
+        target_bytes = TARGET_KBPS * 1000 / 8 / MJPEG_MAX_FPS
+        last = 0.0
+        while not self._stop.is_set():
+            if not self._frame_ready.wait(0.5):
+                continue
+            wait = min_interval - (time.perf_counter() - last)
+            if wait > 0:
+                time.sleep(wait)
+            self._frame_ready.clear()
+            frame, self._latest = self._latest, None
+            if frame is None or not self.frame_clients:
+                continue
+            last = time.perf_counter()
+
+            h, w = frame.shape[:2]
+            if w > MJPEG_MAX_WIDTH:
+                frame = cv2.resize(frame, (MJPEG_MAX_WIDTH, int(h * MJPEG_MAX_WIDTH / w)),
+                                   interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            jpg = buf.tobytes()
+            # Adaptive quality: steer encoded size towards the bitrate budget
+            if len(jpg) > target_bytes * 1.2:
+                self.quality = max(JPEG_QUALITY_MIN, self.quality - 5)
+            elif len(jpg) < target_bytes * 0.8:
+                self.quality = min(JPEG_QUALITY_MAX, self.quality + 5)
+            self.stats['frames_encoded'] += 1
+            self.loop.call_soon_threadsafe(self._fanout_frame, jpg)
+
+    # -- event loop side --
+
+    def _fanout_event(self, data):
+        self.stats['events'] += 1
+        for q in self.event_clients:
+            if q.full():
+                q.get_nowait()  # drop the oldest event for this slow client
+            q.put_nowait(data)
+
+    def _fanout_frame(self, jpg):
+        for slot in self.frame_clients:
+            if slot['jpg'] is not None:
+                slot['dropped'] += 1
+                self.stats['frames_dropped'] += 1
+            slot['jpg'] = jpg
+            slot['ready'].set()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode(errors="replace").split()
+            path = parts[1].split("?")[0] if len(parts) > 1 else "/"
+            if path == "/events":
+                await self._serve_events(writer)
+            elif path == "/stream.mjpg":
+                await self._serve_mjpeg(writer)
+            elif path == "/stats":
+                body = json.dumps(dict(self.stats, quality=self.quality)).encode()
+                writer.write(self._headers(200, "application/json", len(body)) + body)
+                await writer.drain()
+            else:
+                writer.write(self._headers(404, "text/plain", 9) + b"not found")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _headers(status, content_type, length=None):
+        reason = {200: "OK", 404: "Not Found"}[status]
+        lines = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}",
+                 "Access-Control-Allow-Origin: *", "Cache-Control: no-cache"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    async def _serve_events(self, writer):
+        q = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.event_clients.add(q)
+        self.stats['clients'] += 1
+        try:
+            writer.write(self._headers(200, "text/event-stream"))
+            await writer.drain()
+            while True:
+                try:
+                    data = await asyncio.wait_for(q.get(), timeout=15)
+                    writer.write(b"data: " + data + b"\n\n")
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                await writer.drain()
+        finally:
+            self.event_clients.discard(q)
+            self.stats['clients'] -= 1
+
+    async def _serve_mjpeg(self, writer):
+        slot = {'jpg': None, 'ready': asyncio.Event(), 'dropped': 0}
+        self.frame_clients.append(slot)
+        self.stats['clients'] += 1
+        try:
+            writer.write(self._headers(200, "multipart/x-mixed-replace; boundary=" + BOUNDARY.decode()))
+            await writer.drain()
+            while True:
+                await slot['ready'].wait()
+                slot['ready'].clear()
+                jpg, slot['jpg'] = slot['jpg'], None
+                if jpg is None:
+                    continue
+                writer.write(b"--" + BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                             + f"Content-Length: {len(jpg)}\r\n\r\n".encode() + jpg + b"\r\n")
+                await writer.drain()
+        finally:
+            self.frame_clients.remove(slot)
+            self.stats['clients'] -= 1
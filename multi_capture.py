@@ -0,0 +1,201 @@
+"""
+multi_capture.py
+N camera sources (e.g. front road camera + sign camera) feeding one shared
+scheduler instead of one script per camera.
+
+Each source has a capture thread and a timestamped ring buffer, so frames from
+different cameras can be aligned by time. Frames are handed to a
+RealtimeScheduler stream per source (see scheduler.py): a source never has two
+frames in flight (stateful detectors such as MOG2 see frames in order), the
+road camera runs as a critical stream and the sign camera as best-effort.
+
+    python multi_capture.py
+"""
+
+import bisect
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from lean_capture import LeanCapture
+from scheduler import RealtimeScheduler
+
+# -----------------------
+# Configuration
+# -----------------------
+RING_SIZE = 64
+ALIGN_TOLERANCE_SEC = 0.05
+SPEECH_DEADLINE_MS = 3000
+
+SOURCES = [
+    # task class: critical (never skipped) / best_effort (degraded first), see scheduler.py
+    # luma: hand the task the decoder's Y plane instead of BGR (see lean_capture.py). Not for the
+    # road source yet: the detector's thresholds are tuned on cvtColor gray and Y moves its confirmations
+    {'name': 'road', 'uri': "pothole_road_sample1.mp4", 'task': 'pothole', 'class': 'critical', 'deadline_ms': 100},
+    {'name': 'sign', 'uri': 0, 'task': 'ocr', 'class': 'best_effort', 'deadline_ms': 500, 'stride': 3},
+]
+# -----------------------
+
+
+class FrameSource:
+    """Capture thread + ring buffer of (ts, seq, frame) for one camera or file"""
+
+    def __init__(self, name, uri, on_frame=None, realtime=True, luma=False):
+        self.name = name
+        self.uri = uri
+        self.on_frame = on_frame
+        self.realtime = realtime
+        self.ring = deque(maxlen=RING_SIZE)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.fps = 30.0
+        self.size = (0, 0)
+        self.finished = threading.Event()
+        self.cap = LeanCapture(uri, luma=luma)
+        if self.cap.isOpened():
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def start(self, stop_evt):
+        threading.Thread(target=self._run, args=(stop_evt,), daemon=True).start()
+
+    def _run(self, stop_evt):
+        # Files are paced to their frame rate so they behave like a live camera
+        is_file = isinstance(self.uri, str)
+        interval = 1.0 / self.fps
+        next_t = time.monotonic()
+        while not stop_evt.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            ts = time.monotonic()
+            with self.lock:
+                self.seq += 1
+                self.ring.append((ts, self.seq, frame))
+            if self.on_frame:
+                self.on_frame(self, ts, self.seq, frame)
+            if is_file and self.realtime:
+                next_t += interval
+                time.sleep(max(0.0, next_t - time.monotonic()))
+        self.cap.release()
+        self.finished.set()
+
+    def latest(self):
+        with self.lock:
+            return self.ring[-1] if self.ring else None
+
+    def nearest(self, ts, tolerance=ALIGN_TOLERANCE_SEC):
+        """Frame closest in time to ts (within tolerance), or None"""
+        with self.lock:
+            items = list(self.ring)
+        if not items:
+            return None
+        times = [it[0] for it in items]
+        i = bisect.bisect_left(times, ts)
+        best = min((c for c in (i - 1, i) if 0 <= c < len(items)), key=lambda c: abs(times[c] - ts))
+        return items[best] if abs(times[best] - ts) <= tolerance else None
+
+
+class MultiCapture:
+    """Sources + shared scheduler; aligned() returns time-matched frames across cameras"""
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or RealtimeScheduler()
+        self.sources = {}
+        self.stop_evt = threading.Event()
+
+    def add_source(self, name, uri, handler, task_class='best_effort', deadline_ms=100, stride=1, luma=False):
+        """handler(frame, ts, seq) runs on the scheduler for every admitted frame"""
+        src = FrameSource(name, uri, on_frame=lambda s, ts, seq, f: self.scheduler.submit(s.name, f, ts, seq),
+                          luma=luma)
+        if not src.is_opened():
+            print(f"WARNING: cannot open source {name} ({uri}); skipping")
+            return None
+        self.sources[name] = src
+        self.scheduler.register(name, handler, task_class, deadline_ms, stride)
+        return src
+
+    def aligned(self, ts=None, tolerance=ALIGN_TOLERANCE_SEC):
+        """{name: (ts, seq, frame)} nearest to ts (default: newest frame of any source)"""
+        if ts is None:
+            latest = [s.latest() for s in self.sources.values()]
+            ts = max((it[0] for it in latest if it), default=time.monotonic())
+        return {name: s.nearest(ts, tolerance) for name, s in self.sources.items()}
+
+    def start(self):
+        self.scheduler.start()
+        for s in self.sources.values():
+            s.start(self.stop_evt)
+
+    def stop(self):
+        self.stop_evt.set()
+        self.scheduler.stop()
+
+    def finished(self):
+        return all(s.finished.is_set() for s in self.sources.values())
+
+
+def make_pothole_task(mc, name, size):
+    from pothole_detector import PotholeDetector
+    detector = PotholeDetector(*size)
+
+    def run(frame, ts, seq):
+        detections, confirmed = detector.process(frame)
+        for tid, tdata in confirmed:
+            others = {k: v[1] if v else None for k, v in mc.aligned(ts).items() if k != name}
+            print(f"[{name}] Confirmed {tdata['kind']} id={tid} at frame {seq} (aligned frames: {others})")
+    return run
+
+
+def make_ocr_task(mc, name):
+    from ocr_engine import filter_results, get_reader, to_small_rgb
+    from ocr_cache import TextRegionTracker
+    from stable_text import StableTextVoter
+    tracker = TextRegionTracker(get_reader())
+    voter = StableTextVoter()
+
+    def run(frame, ts, seq):
+        _, joined = filter_results(tracker.readtext(to_small_rgb(frame)))
+        changed = voter.push(joined.split())
+        if changed:
+            print(f"[{name}] Text: {changed}")
+            mc.scheduler.submit('speech', changed)
+    return run
+
+
+def main():
+    from ocr_engine import speak_now
+    mc = MultiCapture()
+    mc.scheduler.register('speech', lambda text, ts, seq: speak_now(text), 'background', SPEECH_DEADLINE_MS)
+    for cfg in SOURCES:
+        probe = FrameSource(cfg['name'], cfg['uri'])
+        opened, size = probe.is_opened(), probe.size
+        probe.cap.release()
+        if not opened:
+            print(f"WARNING: cannot open source {cfg['name']} ({cfg['uri']}); skipping")
+            continue
+        handler = make_pothole_task(mc, cfg['name'], size) if cfg['task'] == 'pothole' else make_ocr_task(mc, cfg['name'])
+        mc.add_source(cfg['name'], cfg['uri'], handler, cfg['class'], cfg['deadline_ms'], cfg.get('stride', 1),
+                      cfg.get('luma', False))
+    if not mc.sources:
+        raise SystemExit("No sources could be opened")
+
+    mc.start()
+    try:
+        while not mc.finished():
+            time.sleep(1.0)
+            print("Scheduler:", mc.scheduler.stats())
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+    finally:
+        mc.stop()
+        print("Final:", mc.scheduler.stats())
+
+
+if __name__ == "__main__":
+    main()
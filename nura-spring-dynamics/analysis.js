@@ -0,0 +1,166 @@
+// Analysis charts, drawn from the precomputed trip rollup written by trip_analytics.py
+const ANALYTICS_URL = "data/trip_analytics.json"
+
+const KIND_COLORS = {
+  pothole: "#3b82f6",
+  puddle: "#06b6d4",
+  bump: "#8b5cf6",
+}
+
+let tripData = null
+
+function themeColor(name) {
+  return getComputedStyle(document.body).getPropertyValue(name).trim() || "#a0a0a0"
+}
+
+function setupCanvas(id) {
+  const canvas = document.getElementById(id)
+  if (!canvas) return null
+  const parent = canvas.parentElement
+  canvas.width = parent.clientWidth || 300
+  canvas.height = parent.clientHeight || 150
+  const ctx = canvas.getContext("2d")
+  ctx.clearRect(0, 0, canvas.width, canvas.height)
+  return { canvas, ctx, w: canvas.width, h: canvas.height }
+}
+
+function drawLine(c, values, color, maxValue, pad = 6) {
+  if (!values.length) return
+  const max = maxValue || Math.max(...values, 1)
+  const step = values.length > 1 ? (c.w - pad * 2) / (values.length - 1) : 0
+  c.ctx.strokeStyle = color
+  c.ctx.lineWidth = 2
+  c.ctx.beginPath()
+  values.forEach((v, i) => {
+    const x = pad + i * step
+    const y = c.h - pad - (v / max) * (c.h - pad * 2)
+    if (i === 0) c.ctx.moveTo(x, y)
+    else c.ctx.lineTo(x, y)
+  })
+  c.ctx.stroke()
+}
+
+function drawBars(c, values, color, pad = 6) {
+  if (!values.length) return
+  const max = Math.max(...values, 1)
+  const barW = (c.w - pad * 2) / values.length
+  c.ctx.fillStyle = color
+  values.forEach((v, i) => {
+    const barH = (v / max) * (c.h - pad * 2)
+    c.ctx.fillRect(pad + i * barW + 1, c.h - pad - barH, Math.max(barW - 2, 1), barH)
+  })
+}
+
+function drawPie(c, parts) {
+  const total = parts.reduce((sum, p) => sum + p.value, 0)
+  const r = Math.min(c.w, c.h) / 2 - 8
+  let start = -Math.PI / 2
+  if (!total) {
+    c.ctx.strokeStyle = themeColor("--border")
+    c.ctx.beginPath()
+    c.ctx.arc(c.w / 2, c.h / 2, r, 0, Math.PI * 2)
+    c.ctx.stroke()
+    return
+  }
+  parts.forEach((p) => {
+    const angle = (p.value / total) * Math.PI * 2
+    c.ctx.fillStyle = p.color
+    c.ctx.beginPath()
+    c.ctx.moveTo(c.w / 2, c.h / 2)
+    c.ctx.arc(c.w / 2, c.h / 2, r, start, start + angle)
+    c.ctx.closePath()
+    c.ctx.fill()
+    start += angle
+  })
+}
+
+function drawLabel(c, text) {
+  c.ctx.fillStyle = themeColor("--text-secondary")
+  c.ctx.font = "12px Arial"
+  c.ctx.fillText(text, 8, 16)
+}
+
+function setMetric(canvasId, value, unit) {
+  const card = document.getElementById(canvasId).closest(".metric-card")
+  if (!card) return
+  card.querySelector(".metric-value").innerHTML = `${value}<span class="metric-unit">${unit}</span>`
+}
+
+function sumSeries(series) {
+  return series.t.map((_, i) => series.pothole[i] + series.puddle[i] + series.bump[i])
+}
+
+function renderCharts() {
+  if (!tripData) return
+  const trip = tripData.trip
+  const minutes = tripData.per_minute
+  // Short trips have too few minute buckets to plot; use the per-second ring instead
+  const series = minutes.t.length >= 3 ? minutes : tripData.per_second
+
+  let c = setupCanvas("roughnessChart")
+  if (c) drawLine(c, series.roughness, KIND_COLORS.pothole, 10)
+  setMetric("roughnessChart", trip.roughness_mean.toFixed(1), "/10")
+
+  c = setupCanvas("adjustmentsChart")
+  if (c) drawBars(c, series.adjustments, themeColor("--accent-secondary"))
+  setMetric("adjustmentsChart", Math.round(trip.adjustments_per_hr), "/hr")
+
+  c = setupCanvas("obstaclesChart")
+  if (c) drawBars(c, sumSeries(series), themeColor("--success"))
+  setMetric("obstaclesChart", trip.obstacles, "/trip")
+
+  c = setupCanvas("terrainChart")
+  if (c) {
+    const terrain = series
+    const max = Math.max(1, ...terrain.pothole, ...terrain.puddle, ...terrain.bump)
+    Object.keys(KIND_COLORS).forEach((kind) => drawLine(c, terrain[kind], KIND_COLORS[kind], max))
+    drawLabel(c, `${terrain.t.length} buckets, ${Math.round(trip.duration_s / 60)} min trip`)
+  }
+
+  c = setupCanvas("detectionPieChart")
+  const totals = tripData.totals
+  if (c) {
+    drawPie(
+      c,
+      Object.keys(KIND_COLORS).map((kind) => ({ value: totals[kind] || 0, color: KIND_COLORS[kind] })),
+    )
+  }
+  updatePieLegend(totals)
+
+  c = setupCanvas("responseChart")
+  if (c) {
+    const latency = tripData.latency_ms
+    drawBars(c, latency.counts, themeColor("--warning"))
+    if (latency.p50 !== null) drawLabel(c, `p50 ≤ ${latency.p50} ms, p95 ≤ ${latency.p95} ms`)
+  }
+}
+
+function updatePieLegend(totals) {
+  const total = Object.values(totals).reduce((a, b) => a + b, 0)
+  const labels = { pothole: "Potholes", puddle: "Puddles", bump: "Speed Bumps" }
+  const items = document.querySelectorAll(".chart-legend .legend-item span:last-child")
+  Object.keys(labels).forEach((kind, i) => {
+    if (!items[i]) return
+    const pct = total ? Math.round((100 * (totals[kind] || 0)) / total) : 0
+    items[i].textContent = `${labels[kind]} (${pct}%)`
+  })
+}
+
+document.querySelectorAll(".chart-btn").forEach((btn) => {
+  btn.addEventListener("click", () => {
+    document.querySelectorAll(".chart-btn").forEach((b) => b.classList.remove("active"))
+    btn.classList.add("active")
+    // A single trip rollup has no day/week/month split yet; keep the same series
+    renderCharts()
+  })
+})
+
+window.addEventListener("resize", renderCharts)
+
+fetch(ANALYTICS_URL, { cache: "no-store" })
+  .then((res) => (res.ok ? res.json() : Promise.reject(res.status)))
+  .then((data) => {
+    tripData = data
+    renderCharts()
+  })
+  .catch((err) => console.log(`[v0] No trip analytics available (${err})`))
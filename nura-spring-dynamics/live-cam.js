@@ -182,29 +182,79 @@ class RoadSimulator {
   }
 
   detectObstacle(obs) {
-    // Update counters
-    if (obs.type === "pothole") {
-      potholeCount++
-      document.getElementById("potholeCount").textContent = potholeCount
-    } else if (obs.type === "puddle") {
-      puddleCount++
-      document.getElementById("puddleCount").textContent = puddleCount
-    } else if (obs.type === "bump") {
-      bumpCount++
-      document.getElementById("bumpCount").textContent = bumpCount
-    }
+    recordDetection(obs.type)
+  }
+}
+
+function recordDetection(type) {
+  // Update counters
+  if (type === "pothole") {
+    potholeCount++
+    document.getElementById("potholeCount").textContent = potholeCount
+  } else if (type === "puddle") {
+    puddleCount++
+    document.getElementById("puddleCount").textContent = puddleCount
+  } else if (type === "bump") {
+    bumpCount++
+    document.getElementById("bumpCount").textContent = bumpCount
+  }
+
+  adjustmentCount++
+  document.getElementById("adjustmentCount").textContent = adjustmentCount
+
+  // Add to recent detections
+  addDetectionToList(type)
+
+  // Show alert if enabled
+  if (settings.alertsEnabled) {
+    showAlert(type)
+  }
+}
 
-    adjustmentCount++
-    document.getElementById("adjustmentCount").textContent = adjustmentCount
+// Live detector stream (live_stream.py). Falls back to the simulation when no detector is running.
+// Override the address with ?stream=http://host:port
+const STREAM_URL = new URLSearchParams(window.location.search).get("stream") || "http://localhost:8766"
+const liveFrame = new Image()
+let liveConnected = false
 
-    // Add to recent detections
-    addDetectionToList(obs.type)
+const typeEnabled = {
+  pothole: () => settings.potholeDetection,
+  puddle: () => settings.puddleDetection,
+  bump: () => settings.bumpDetection,
+}
+
+function connectLiveStream() {
+  if (!window.EventSource) return
+
+  let everConnected = false
+  const source = new EventSource(STREAM_URL + "/events")
+
+  source.onopen = () => {
+    everConnected = true
+    liveConnected = true
+    liveFrame.src = STREAM_URL + "/stream.mjpg?t=" + Date.now()
+    console.log("[v0] Connected to live detector at " + STREAM_URL)
+  }
 
-    // Show alert if enabled
-    if (settings.alertsEnabled) {
-      showAlert(obs.type)
+  source.onmessage = (e) => {
+    const event = JSON.parse(e.data)
+    const enabled = typeEnabled[event.type]
+    if (enabled && enabled()) {
+      recordDetection(event.type)
     }
   }
+
+  source.onerror = () => {
+    liveConnected = false
+    // No detector running: stop retrying and keep the simulation
+    if (!everConnected) source.close()
+  }
+}
+
+function drawLiveFrame() {
+  ctx.globalAlpha = Math.min(1, settings.brightness / 50)
+  ctx.drawImage(liveFrame, 0, 0, canvas.width, canvas.height)
+  ctx.globalAlpha = 1
 }
 
 function addDetectionToList(type) {
@@ -239,11 +289,16 @@ function showAlert(type) {
 const roadSim = new RoadSimulator()
 
 function animate() {
-  roadSim.update()
-  roadSim.draw()
+  if (liveConnected && liveFrame.complete && liveFrame.naturalWidth > 0) {
+    drawLiveFrame()
+  } else {
+    roadSim.update()
+    roadSim.draw()
+  }
   requestAnimationFrame(animate)
 }
 
+connectLiveStream()
 animate()
 
 console.log("[v0] Live cam simulation started")
@@ -0,0 +1,133 @@
+"""
+ocr_cache.py
+Temporal OCR result cache: tracks detected text regions across OCR passes and
+only re-runs recognition when a region changes appearance or has grown enough
+to give a sharper read. Drop-in for reader.readtext() on a single image.
+"""
+
+import cv2
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+MATCH_IOU = 0.3          # min IoU to treat a box as the same text region
+HASH_SIZE = 8            # difference-hash grid (HASH_SIZE x HASH_SIZE bits)
+HASH_MAX_DIST = 6        # max differing bits to call the region "unchanged"
+REREAD_GROWTH = 1.3      # re-read once the box area grows by this factor
+MAX_LOST_PASSES = 3      # drop a track after this many passes without a box
+# -----------------------
+
+
+def hbox_to_quad(hbox):
+    """easyocr horizontal box [x_min, x_max, y_min, y_max] -> 4-point bbox"""
+    x_min, x_max, y_min, y_max = hbox
+    return [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+
+
+def box_area(hbox):
+    x_min, x_max, y_min, y_max = hbox
+    return max(0, x_max - x_min) * max(0, y_max - y_min)
+
+
+def box_iou(a, b):
+    ix = min(a[1], b[1]) - max(a[0], b[0])
+    iy = min(a[3], b[3]) - max(a[2], b[2])
+    if ix <= 0 or iy <= 0:
+        return 0.0
+    inter = ix * iy
+    return inter / float(box_area(a) + box_area(b) - inter + 1e-6)
+
+
+def appearance_hash(gray, hbox):
+    """Difference hash of the region; small Hamming distance == same look"""
+    h, w = gray.shape[:2]
+    x_min, x_max = max(0, int(hbox[0])), min(w, int(hbox[1]))
+    y_min, y_max = max(0, int(hbox[2])), min(h, int(hbox[3]))
+    patch = gray[y_min:y_max, x_min:x_max]
+    if patch.size == 0:
+        return 0
+    small = cv2.resize(patch, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class TextRegionTracker:
+    """Caches recognized strings per tracked text box between OCR passes"""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.tracks = {}  # { id: {'box', 'hash', 'text', 'conf', 'read_area', 'last_pass'} }
+        self.next_id = 1
+        self.pass_idx = 0
+        self.reads = 0
+        self.skips = 0
+
+    def clear(self):
+        self.tracks.clear()
+
+    def _recognize(self, gray, hbox):
+        res = self.reader.recognize(gray, horizontal_list=[hbox], free_list=[])
+        self.reads += 1
+        if not res:
+            return "", 0.0
+        _, text, conf = res[0]
+        return text, float(conf)
+
+    def _match(self, hbox, taken):
+        best_tid, best_iou = None, MATCH_IOU
+        for tid, t in self.tracks.items():
+            if tid in taken:
+                continue
+            iou = box_iou(hbox, t['box'])
+            if iou >= best_iou:
+                best_tid, best_iou = tid, iou
+        return best_tid
+
+    def readtext(self, rgb):
+        """Same output as reader.readtext(rgb): [(bbox, text, conf), ...]"""
+        self.pass_idx += 1
+        gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+        horizontal_list, free_list = self.reader.detect(rgb)
+        horizontal_list, free_list = horizontal_list[0], free_list[0]
+
+        results = []
+        taken = set()
+        for hbox in horizontal_list:
+            area = box_area(hbox)
+            h = appearance_hash(gray, hbox)
+            tid = self._match(hbox, taken)
+            if tid is None:
+                tid = self.next_id
+                self.next_id += 1
+                t = self.tracks[tid] = {'read_area': 0}
+                stale = True
+            else:
+                t = self.tracks[tid]
+                stale = (hamming(h, t['hash']) > HASH_MAX_DIST
+                         or area >= t['read_area'] * REREAD_GROWTH)
+            taken.add(tid)
+            if stale:
+                t['text'], t['conf'] = self._recognize(gray, hbox)
+                t['read_area'] = area
+                t['hash'] = h
+            else:
+                self.skips += 1
+            t['box'] = hbox
+            t['last_pass'] = self.pass_idx
+            results.append((hbox_to_quad(hbox), t['text'], t['conf']))
+
+        # Rotated/free-form boxes are rare on road signs; recognize them every pass
+        if free_list:
+            results.extend(self.reader.recognize(gray, horizontal_list=[], free_list=free_list))
+            self.reads += len(free_list)
+
+        for tid in [tid for tid, t in self.tracks.items()
+                    if self.pass_idx - t['last_pass'] > MAX_LOST_PASSES]:
+            del self.tracks[tid]
+
+        return results
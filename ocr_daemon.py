@@ -0,0 +1,163 @@
+"""
+ocr_daemon.py
+Headless OCR + TTS daemon for the vehicle: no window, no overlay drawing.
+A small local HTTP API exposes the stable text and runtime controls.
+
+    GET  /text     -> {"text": ..., "updated": ts}
+    POST /clear    -> clears voting history and current text
+    GET  /config   -> {"conf_threshold": ..., "frame_skip": ...}
+    POST /config   -> JSON body with any of the keys above
+    GET  /events   -> text/event-stream, one event per stable-text change
+"""
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ocr_engine
+from ocr_engine import (CONF_THRESHOLD, DETECTION_HISTORY, FRAME_SKIP, REQUIRED_AGREE,
+                        tts_worker)
+from fleet_uploader import FleetUploader
+from stable_text import StableTextVoter
+
+# -----------------------
+# Configuration
+# -----------------------
+HOST = "127.0.0.1"
+PORT = 8765
+EVENT_QUEUE_SIZE = 16
+UPLOAD_TEXT = True   # spool stable-text changes for the fleet backend (see fleet_uploader.py)
+VEHICLE_ID = "vehicle-1"
+# -----------------------
+
+settings = {'conf_threshold': CONF_THRESHOLD, 'frame_skip': FRAME_SKIP}
+voter = StableTextVoter(DETECTION_HISTORY, REQUIRED_AGREE)
+state = {'updated': 0.0}
+state_lock = threading.Lock()
+subscribers = []  # one queue.Queue per /events client
+stop_event = threading.Event()
+
+
+def publish(text):
+    """Fan a stable-text change out to every /events client; slow clients drop events"""
+    event = {'text': text, 'ts': time.time()}
+    with state_lock:
+        state['updated'] = event['ts']
+        clients = list(subscribers)
+    for q in clients:
+        try:
+            q.put_nowait(event)
+        except queue.Full:
+            pass
+
+
+class ControlHandler(BaseHTTPRequestHandler):
+    def _send_json(self, obj, status=200):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/text":
+            with state_lock:
+                self._send_json({'text': voter.text, 'updated': state['updated']})
+        elif self.path == "/config":
+            self._send_json(settings)
+        elif self.path == "/events":
+            self._stream_events()
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        if self.path == "/clear":
+            with state_lock:
+                voter.clear()
+            publish("")
+            self._send_json({'ok': True})
+        elif self.path == "/config":
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if 'conf_threshold' in body:
+                    settings['conf_threshold'] = min(1.0, max(0.0, float(body['conf_threshold'])))
+                if 'frame_skip' in body:
+                    settings['frame_skip'] = max(1, int(body['frame_skip']))
+            except (ValueError, TypeError) as e:
+                self._send_json({'error': str(e)}, 400)
+                return
+            self._send_json(settings)
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def _stream_events(self):
+        q = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with state_lock:
+            subscribers.append(q)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            while not stop_event.is_set():
+                try:
+                    event = q.get(timeout=1.0)
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                except queue.Empty:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with state_lock:
+                subscribers.remove(q)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main():
+    speech_queue = queue.Queue(maxsize=4)
+    threading.Thread(target=tts_worker, args=(speech_queue, stop_event), daemon=True).start()
+
+    server = ThreadingHTTPServer((HOST, PORT), ControlHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"OCR daemon listening on http://{HOST}:{PORT}")
+    uploader = FleetUploader(vehicle_id=VEHICLE_ID).start() if UPLOAD_TEXT else None
+    boot_id = int(time.time())
+    seq = [0]
+
+    def on_result(filtered, joined_text, ts):
+        with state_lock:
+            changed = voter.push(joined_text.split())
+        if changed is None:
+            return
+        # A clear ("") is published and timestamped too, so clients see the sign go
+        print(f"[Detected]: {changed}" if changed else "[Cleared]")
+        publish(changed)
+        if uploader:
+            seq[0] += 1
+            uploader.enqueue({'event_id': f"{VEHICLE_ID}:ocr:{boot_id}:{seq[0]}", 'type': 'text',
+                              'text': changed, 'ts': ts})
+        if changed:
+            try:
+                speech_queue.put_nowait(changed)
+            except queue.Full:
+                pass
+
+    try:
+        ocr_engine.run_headless(settings, on_result, stop_event)
+    finally:
+        stop_event.set()
+        server.shutdown()
+        if uploader:
+            uploader.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+ocr_engine.py
+Single OCR + TTS engine shared by every mode (minimal, threaded, headless).
+easyocr/torch and pyttsx3 are imported lazily, the model is loaded once per
+process and warmed up on a fallback frame, and startup phases are timed.
+
+    python ocr_engine.py [minimal|threaded|headless]
+"""
+
+import os
+import queue
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from lean_capture import LeanCapture
+from ocr_cache import TextRegionTracker
+from overlay import Overlay
+from stable_text import StableTextVoter
+import warm_start
+
+# -----------------------
+# Configuration
+# -----------------------
+CAM_INDEX = 0
+FRAME_SKIP = 3
+DOWNSCALE = 0.5
+CONF_THRESHOLD = 0.4
+DETECTION_HISTORY = 5
+REQUIRED_AGREE = 2
+SPEECH_THROTTLE_SEC = 2
+DRAW_BOXES = True
+LANGS = ['en']
+WARMUP_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "ocr_fallback_frames", "frame_30.jpg")
+# -----------------------
+
+_reader = None
+_reader_lock = threading.Lock()
+startup_times = {}  # phase -> seconds, filled in as the engine comes up
+
+
+def get_reader():
+    """Load the easyocr model once per process (thread-safe, from the warm_start snapshot) and warm it up"""
+    global _reader
+    with _reader_lock:
+        if _reader is not None:
+            return _reader
+        t0 = time.perf_counter()
+        import easyocr  # noqa: F401  (timed separately from the model load)
+        t1 = time.perf_counter()
+        reader = warm_start.load_reader(LANGS, gpu=False)
+        t2 = time.perf_counter()
+        startup_times['import'] = t1 - t0
+        startup_times['model_load'] = t2 - t1
+        warmup(reader)
+        _reader = reader
+        return _reader
+
+
+def warmup(reader):
+    """Run one pass on the fallback frame so the first live frame is not the slow one"""
+    img = cv2.imread(WARMUP_IMAGE)
+    if img is None:
+        return
+    t0 = time.perf_counter()
+    small = cv2.resize(img, (0, 0), fx=DOWNSCALE, fy=DOWNSCALE)
+    reader.readtext(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+    startup_times['warmup'] = time.perf_counter() - t0
+
+
+def preload():
+    """Start loading the model in the background (overlaps with camera open)"""
+    t = threading.Thread(target=get_reader, daemon=True)
+    t.start()
+    return t
+
+
+def report_startup(t_start):
+    startup_times['total'] = time.perf_counter() - t_start
+    print("Startup: " + ", ".join(f"{k}={v:.2f}s" for k, v in startup_times.items()))
+
+
+def open_camera(cam_index=CAM_INDEX, tuned=True):
+    cap = cv2.VideoCapture(cam_index)
+    if tuned:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        cap.set(cv2.CAP_PROP_FPS, 30)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def to_small_rgb(frame):
+    small = cv2.resize(frame, (0, 0), fx=DOWNSCALE, fy=DOWNSCALE)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+
+
+def bbox_center(b):
+    xs = [p[0] for p in b]
+    ys = [p[1] for p in b]
+    return (sum(xs) / len(xs), sum(ys) / len(ys))
+
+
+def filter_results(results, conf_threshold=CONF_THRESHOLD):
+    """Drop low-confidence/empty results; join the rest in reading order"""
+    filtered = []
+    for bbox, text, conf in results:
+        if conf >= conf_threshold:
+            clean = text.strip()
+            if clean:
+                filtered.append((bbox, clean, float(conf)))
+    filtered_sorted = sorted(filtered, key=lambda it: (bbox_center(it[0])[1], bbox_center(it[0])[0]))
+    joined = " ".join([it[1] for it in filtered_sorted])
+    return filtered, joined
+
+
+# -----------------------
+# TTS
+# -----------------------
+
+def speak_now(text: str):
+    """Create a fresh pyttsx3 engine each time, speak, then try to clean up."""
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+        engine.say(text)
+        engine.runAndWait()
+        try:
+            engine.stop()
+        except Exception:
+            pass
+        try:
+            del engine
+        except Exception:
+            pass
+    except Exception as e:
+        print("TTS error (speak_now):", e)
+
+
+def speak_text(engine, text):
+    """Speak text using TTS engine"""
+    if not text:
+        return
+    try:
+        engine.say(text)
+        engine.runAndWait()
+    except Exception as e:
+        print(f"TTS error: {e}")
+
+
+def tts_worker(speech_q: queue.Queue, stop_evt: threading.Event):
+    """Speaks queued text off the capture loop so TTS never stalls OCR"""
+    import pyttsx3
+    engine = pyttsx3.init()
+    last_spoken_time = 0
+    while not stop_evt.is_set():
+        try:
+            text = speech_q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        now = time.time()
+        if now - last_spoken_time < SPEECH_THROTTLE_SEC:
+            continue
+        speak_text(engine, text)
+        last_spoken_time = now
+
+
+# -----------------------
+# OCR worker
+# -----------------------
+
+def ocr_worker(frame_q: queue.Queue, res_q: queue.Queue, stop_evt: threading.Event, settings=None):
+    """OCR worker thread that processes frames. settings['conf_threshold'] overrides CONF_THRESHOLD live"""
+    tracker = TextRegionTracker(get_reader())
+    while not stop_evt.is_set():
+        try:
+            small_rgb = frame_q.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        try:
+            results = tracker.readtext(small_rgb)
+        except Exception:
+            res_q.put(([], "", time.time()))
+            continue
+        conf_threshold = settings['conf_threshold'] if settings else CONF_THRESHOLD
+        filtered, joined = filter_results(results, conf_threshold)
+        res_q.put((filtered, joined, time.time()))
+
+
+# -----------------------
+# Modes
+# -----------------------
+
+def run_minimal(cam_index=CAM_INDEX):
+    """Bare-minimum OCR + immediate TTS (fresh TTS engine per utterance)."""
+    t_start = time.perf_counter()
+    loader = preload()
+    # Only every FRAME_SKIP-th frame is used (OCR + display); the rest are grab()bed
+    cap = LeanCapture(cv2.VideoCapture(cam_index), skip=FRAME_SKIP)
+    if not cap.isOpened():
+        raise RuntimeError("Cannot open camera")
+    loader.join()
+    reader = get_reader()
+    report_startup(t_start)
+
+    last_text = ""
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                print("Camera read failed, exiting.")
+                break
+
+            try:
+                results = reader.readtext(to_small_rgb(frame))
+            except Exception as e:
+                print("OCR error:", e)
+                continue
+
+            words = [text.strip() for bbox, text, conf in results if conf >= CONF_THRESHOLD]
+            detected = " ".join(words).strip()
+
+            if detected and detected != last_text:
+                last_text = detected
+                print("[DETECTED]:", detected)
+                speak_now(detected)
+
+            # Optional single-line overlay; ignored on headless OpenCV builds
+            try:
+                cv2.putText(frame, last_text, (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+                cv2.imshow("Minimal OCR+TTS (reinit)", frame)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+            except Exception:
+                pass
+
+    except KeyboardInterrupt:
+        print("\nInterrupted by user.")
+    finally:
+        try:
+            cap.release()
+        except Exception:
+            pass
+        try:
+            cv2.destroyAllWindows()
+        except Exception:
+            pass
+        print("Exited cleanly.")
+
+
+def run_threaded(cam_index=CAM_INDEX, window_flags=cv2.WINDOW_NORMAL, window_size=(1280, 720)):
+    """Stable-text display: OCR on a worker thread, token voting, overlay window."""
+    import pyttsx3
+
+    t_start = time.perf_counter()
+    loader = preload()
+    frame_queue = queue.Queue(maxsize=2)
+    result_queue = queue.Queue()
+    stop_event = threading.Event()
+
+    tts = pyttsx3.init()
+    cap = open_camera(cam_index)
+    if not cap.isOpened():
+        print(f"ERROR: Cannot open camera {cam_index}")
+        print("Tips:")
+        print("1. Check if camera is connected")
+        print("2. Try different CAM_INDEX values (0, 1, 2)")
+        print("3. Close other apps using the camera")
+        return
+
+    # Verify camera is actually working
+    ret, test_frame = cap.read()
+    if not ret or test_frame is None:
+        print("ERROR: Camera opened but cannot read frames")
+        cap.release()
+        return
+    print(f"Camera initialized: {test_frame.shape[1]}x{test_frame.shape[0]}")
+
+    loader.join()
+    report_startup(t_start)
+    worker = threading.Thread(target=ocr_worker, args=(frame_queue, result_queue, stop_event), daemon=True)
+    worker.start()
+
+    window_name = "Stable Text OCR + TTS (Press Q to quit, C to clear)"
+    try:
+        cv2.namedWindow(window_name, window_flags)
+        if window_size and window_flags == cv2.WINDOW_NORMAL:
+            cv2.resizeWindow(window_name, *window_size)
+    except Exception:
+        # If namedWindow fails, imshow will create the window itself
+        pass
+
+    frame_count = 0
+    voter = StableTextVoter(DETECTION_HISTORY, REQUIRED_AGREE)
+    overlay = Overlay()
+    last_spoken_time = 0
+    last_filtered = []
+    prev_time = time.time()
+    fps = 0.0
+
+    print("\nControls:")
+    print("  Q - Quit")
+    print("  C - Clear detected text")
+    print("\nStarting main loop...\n")
+
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                print("WARNING: Frame read failed")
+                time.sleep(0.1)
+                continue
+
+            frame_count += 1
+
+            # Send frame to OCR worker
+            if frame_count % FRAME_SKIP == 0:
+                try:
+                    frame_queue.put_nowait(to_small_rgb(frame))
+                except queue.Full:
+                    pass
+
+            # Get OCR results; votes are only updated when a result arrives
+            try:
+                while True:
+                    filtered, joined_text, ts = result_queue.get_nowait()
+                    last_filtered = filtered
+                    changed = voter.push(joined_text.split())
+                    if changed:
+                        print(f"[Detected]: {changed}")
+                        now = time.time()
+                        if now - last_spoken_time >= SPEECH_THROTTLE_SEC:
+                            speak_text(tts, changed)
+                            last_spoken_time = now
+            except queue.Empty:
+                pass
+
+            display_text = voter.text
+
+            # Overlay elements are retained: only re-rasterized when their content changes,
+            # and only their own pixels are blended into the frame
+            boxes = []
+            if DRAW_BOXES and last_filtered:
+                for bbox, text, conf in last_filtered:
+                    pts = (np.array(bbox, dtype=np.float32) / DOWNSCALE).astype(np.int32)
+                    x_min = int(np.min(pts[:, 0]))
+                    y_min = int(np.min(pts[:, 1])) - 6
+                    boxes.append(('poly', tuple(map(tuple, pts.tolist())), (0, 255, 0), 2))
+                    boxes.append(('text', f"{text} ({conf:.2f})", (x_min, max(y_min, 10)), 0.5, (0, 255, 0), 2))
+            overlay.set('boxes', boxes, alpha=0.9)
+
+            # Calculate FPS
+            cur_time = time.time()
+            dt = cur_time - prev_time if cur_time - prev_time > 1e-6 else 1e-6
+            prev_time = cur_time
+            fps = 0.9 * fps + 0.1 * (1.0 / dt)
+            overlay.set('fps', [('text', f"FPS: {fps:.1f}", (10, 30), 0.8, (255, 0, 0), 2)])
+
+            # Detected text with word wrapping
+            max_chars_per_line = 50
+            if display_text:
+                lines = [display_text[i:i+max_chars_per_line] for i in range(0, len(display_text), max_chars_per_line)]
+            else:
+                lines = ["No text detected"]
+            overlay.set('text', [('text', line, (10, 70 + idx * 30), 0.7, (0, 0, 255), 2)
+                                 for idx, line in enumerate(lines)])
+
+            cv2.imshow(window_name, overlay.render(frame))
+
+            # Handle keyboard input
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q') or key == ord('Q') or key == 27:  # Q or ESC
+                print("\nExiting...")
+                break
+            if key == ord('c') or key == ord('C'):
+                voter.clear()
+                print("[Text cleared]")
+
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+    except Exception as e:
+        print(f"\nUnexpected error: {e}")
+    finally:
+        print("Cleaning up...")
+        stop_event.set()
+        time.sleep(0.3)
+        cap.release()
+        cv2.destroyAllWindows()
+        # Force destroy window
+        cv2.waitKey(1)
+        print("Exited cleanly")
+
+
+def run_headless(settings=None, on_result=None, stop_evt=None, cam_index=CAM_INDEX):
+    """No window, no overlay: capture -> OCR worker -> on_result(filtered, joined, ts)."""
+    settings = settings if settings is not None else {'conf_threshold': CONF_THRESHOLD, 'frame_skip': FRAME_SKIP}
+    stop_evt = stop_evt or threading.Event()
+
+    t_start = time.perf_counter()
+    loader = preload()
+    frame_queue = queue.Queue(maxsize=2)
+    result_queue = queue.Queue()
+
+    # Nothing is displayed, so frames OCR will not see are only grab()bed
+    cap = LeanCapture(open_camera(cam_index, tuned=False), skip=settings['frame_skip'])
+    if not cap.isOpened():
+        print(f"ERROR: Cannot open camera {cam_index}")
+        return
+    loader.join()
+    report_startup(t_start)
+    threading.Thread(target=ocr_worker, args=(frame_queue, result_queue, stop_evt, settings),
+                     daemon=True).start()
+
+    try:
+        while not stop_evt.is_set():
+            cap.set_skip(settings['frame_skip'])  # may be changed live (ocr_daemon /config)
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                time.sleep(0.1)
+                continue
+
+            try:
+                frame_queue.put_nowait(to_small_rgb(frame))
+            except queue.Full:
+                pass
+
+            try:
+                while True:
+                    filtered, joined_text, ts = result_queue.get_nowait()
+                    if on_result:
+                        on_result(filtered, joined_text, ts)
+            except queue.Empty:
+                pass
+
+    except KeyboardInterrupt:
+        print("\nInterrupted by user")
+    finally:
+        stop_evt.set()
+        cap.release()
+        print("Exited cleanly")
+
+
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "threaded"
+    if mode == "minimal":
+        run_minimal()
+    elif mode == "threaded":
+        run_threaded()
+    elif mode == "headless":
+        def _print_result(filtered, joined, ts):
+            if joined:
+                print("[OCR]:", joined)
+        run_headless(on_result=_print_result)
+    else:
+        raise SystemExit(f"Unknown mode: {mode} (expected minimal, threaded or headless)")
@@ -0,0 +1,169 @@
+"""
+offline_background.py
+Block-parallel background model for recorded video, replacing sequential MOG2.
+
+MOG2 makes every frame depend on the one before it, so an offline run is a
+single serial loop. Here the video is cut into blocks of BLOCK_FRAMES. Each
+block's background is the per-pixel median (or BG_PERCENTILE) of the
+preceding BG_WINDOW frames, sampled every BG_SAMPLE_STRIDE frames, and its
+spread is the per-pixel median absolute deviation (the counterpart of MOG2's
+per-pixel variance), both computed as vectorised reductions over the stacked
+frames. A pixel is foreground when it is more than FG_MAD_K robust sigmas from
+the background. The mask is cleaned with the detector's own morphology, so fg
+keeps MOG2's contract (uint8 0/255, processed-window shape).
+
+Blocks are independent: worker processes each seek to their block, build
+that block's background and return per-frame detections. Each worker holds
+at most BG_WINDOW / BG_SAMPLE_STRIDE + BLOCK_FRAMES gray ROI frames. Tracking
+runs afterwards in frame order in the parent, as it depends on the previous
+frame.
+
+    python offline_background.py pothole_road_sample1.mp4 --workers 4 --compare
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+from pothole_detector import ROI_Y_START_FRAC, PotholeDetector
+
+# -----------------------
+# Configuration
+# -----------------------
+BLOCK_FRAMES = 32
+BG_WINDOW = 32          # frames of history behind each block
+BG_SAMPLE_STRIDE = 4    # use every Nth history frame
+BG_PERCENTILE = 50      # 50 = median
+FG_MAD_K = 8.0          # robust sigmas from the background that count as foreground
+FG_MIN_SIGMA = 4.0      # floor for flat, noise-free pixels
+# -----------------------
+
+
+def block_background(stack, percentile=BG_PERCENTILE):
+    """(background, threshold) per pixel from a (n, h, w) uint8 stack"""
+    stack = stack.astype(np.float32)
+    if percentile == 50:
+        background = np.median(stack, axis=0)
+    else:
+        background = np.percentile(stack, percentile, axis=0)
+    sigma = 1.4826 * np.median(np.abs(stack - background), axis=0)  # MAD -> sigma
+    return background, FG_MAD_K * np.maximum(sigma, FG_MIN_SIGMA)
+
+
+def block_foreground(frames, background, threshold):
+    """Raw 0/255 masks for a (n, h, w) block against one background"""
+    return np.where(np.abs(frames - background) > threshold, 255, 0).astype(np.uint8)
+
+
+def _make_detector(size, corridor):
+    w, h = size
+    wc = None
+    if corridor:
+        from wheel_corridor import WheelCorridor
+        wc = WheelCorridor(w, h, int(h * ROI_Y_START_FRAC))
+    return PotholeDetector(w, h, corridor=wc)
+
+
+def detect_block(video, start, stop, size, corridor=False):
+    """Detections for frames [start, stop) -> list of (frame_no, [Detection, ...])"""
+    det = _make_detector(size, corridor)
+    hist_start = max(0, start - BG_WINDOW)
+    cap = cv2.VideoCapture(video)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, hist_start)
+
+    history, grays, edges = [], [], []
+    for n in range(hist_start, stop):
+        if n < start and (start - n) % BG_SAMPLE_STRIDE:
+            if not cap.grab():
+                break
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        gray_eq, e = det.prepare(frame)
+        if n < start:
+            history.append(gray_eq)
+        else:
+            grays.append(gray_eq)
+            edges.append(e)
+    cap.release()
+    if not grays:
+        return []
+
+    block = np.stack(grays)
+    # The first block has no history; like MOG2 warming up, learn from the block itself
+    background, threshold = block_background(np.stack(history) if history else block[::BG_SAMPLE_STRIDE])
+    fgs = block_foreground(block, background, threshold)
+
+    out = []
+    for i in range(len(block)):
+        fg = det.clean_fg(fgs[i])
+        out.append((start + i, det.detect_all(block[i], fg, edges[i])))
+    return out
+
+
+def run_offline(video, workers=None, block=BLOCK_FRAMES, corridor=False):
+    """Parallel detection + sequential tracking; returns (confirmations, frames, seconds)"""
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit("Cannot open video file: " + video)
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+
+    t0 = time.perf_counter()
+    tracker = _make_detector(size, corridor)
+    confirmations = []
+    starts = range(0, n_frames, block)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(detect_block, video, s, min(s + block, n_frames), size, corridor) for s in starts]
+        for fut in futures:  # in order: tracking needs frame order
+            for frame_no, detections in fut.result():
+                for tid, tdata in tracker.track_detections(detections):
+                    confirmations.append((frame_no + 1, tid, tdata['kind']))
+    return confirmations, tracker.frame_idx, time.perf_counter() - t0
+
+
+def run_sequential(video, corridor=False):
+    """Reference: the live MOG2 pipeline over the same video"""
+    cap = cv2.VideoCapture(video)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    det = _make_detector(size, corridor)
+    t0 = time.perf_counter()
+    confirmations = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        _, confirmed = det.process(frame)
+        confirmations += [(det.frame_idx, tid, tdata['kind']) for tid, tdata in confirmed]
+    cap.release()
+    return confirmations, det.frame_idx, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline pothole detection with a block-parallel background model")
+    ap.add_argument("video")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--block", type=int, default=BLOCK_FRAMES)
+    ap.add_argument("--corridor", action="store_true", help="restrict to wheel corridors (wheel_corridor.py)")
+    ap.add_argument("--compare", action="store_true", help="also run sequential MOG2 for reference")
+    args = ap.parse_args()
+
+    runs = [("block-median", lambda: run_offline(args.video, args.workers, args.block, args.corridor))]
+    if args.compare:
+        runs.append(("mog2", lambda: run_sequential(args.video, args.corridor)))
+    for name, fn in runs:
+        confirmations, frames, secs = fn()
+        print(f"{name}: {frames} frames in {secs:.2f}s ({frames / max(secs, 1e-9):.1f} fps), "
+              f"{len(confirmations)} confirmations")
+        for frame_no, tid, kind in confirmations:
+            print(f"  frame {frame_no}: {kind} id={tid}")
+
+
+if __name__ == "__main__":
+    main()
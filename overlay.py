@@ -0,0 +1,122 @@
+"""
+overlay.py
+Retained-mode overlay compositor for the diagnostic windows.
+
+Elements (box outlines, labels, text lines) are registered under a key and
+kept until they change. Each one is rasterized once into a sprite: the
+coordinates of the pixels it covers plus their coverage. Text rasterizations
+are also cached by (text, scale, thickness), so a label that reappears on
+another frame or track is not drawn again. render() blends only the covered
+pixels, so the per-frame cost follows the overlay, not the frame size. For
+non-overlapping elements this matches drawing on a frame copy and
+cv2.addWeighted-ing the whole frame.
+"""
+
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+TEXT_CACHE_SIZE = 512
+# -----------------------
+
+_text_cache = OrderedDict()  # (text, scale, thickness, aa) -> sprite relative to the putText origin
+
+
+def _sprite(mask, x, y):
+    """(ys, xs, coverage) of a mask placed at (x, y); coverage in 0..1"""
+    ys, xs = np.nonzero(mask)
+    return ys + y, xs + x, (mask[ys, xs].astype(np.float32) / 255.0)[:, None]
+
+
+def text_sprite(text, scale, thickness, aa=True):
+    """Cached sprite for a string, relative to the putText origin"""
+    key = (text, scale, thickness, aa)
+    hit = _text_cache.get(key)
+    if hit is not None:
+        _text_cache.move_to_end(key)
+        return hit
+    (w, h), base = cv2.getTextSize(text, FONT, scale, thickness)
+    pad = thickness + 1
+    mask = np.zeros((h + base + 2 * pad, w + 2 * pad), np.uint8)
+    cv2.putText(mask, text, (pad, pad + h), FONT, scale, 255, thickness, cv2.LINE_AA if aa else cv2.LINE_8)
+    hit = _sprite(mask, -pad, -pad - h)
+    _text_cache[key] = hit
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return hit
+
+
+def blend_sprite(frame, sprite, color, alpha=1.0, dx=0, dy=0):
+    """Blend color into the sprite's pixels (shifted by dx, dy); returns pixels touched"""
+    ys, xs, cov = sprite
+    if dx or dy:
+        ys, xs = ys + dy, xs + dx
+    H, W = frame.shape[:2]
+    if len(ys) and (ys.min() < 0 or xs.min() < 0 or ys.max() >= H or xs.max() >= W):
+        keep = (ys >= 0) & (xs >= 0) & (ys < H) & (xs < W)
+        ys, xs, cov = ys[keep], xs[keep], cov[keep]
+    if frame.ndim == 2:
+        color, cov = float(np.mean(color)), cov[:, 0]
+    a = cov * alpha
+    px = frame[ys, xs]
+    frame[ys, xs] = (px * (1.0 - a) + np.asarray(color, np.float32) * a + 0.5).astype(np.uint8)
+    return len(ys)
+
+
+def draw_label(frame, text, org, scale, color, thickness=1, aa=True):
+    """Drop-in for cv2.putText using the cached rasterization"""
+    blend_sprite(frame, text_sprite(text, scale, thickness, aa), color, 1.0, org[0], org[1])
+
+
+class Overlay:
+    """Keyed, retained overlay elements composited onto each frame"""
+
+    def __init__(self):
+        self.layers = OrderedDict()  # key -> (spec, alpha, [(sprite, color, dx, dy)])
+        self.blended_px = 0          # pixels touched by the last render()
+
+    def _rasterize(self, spec):
+        sprites = []
+        for el in spec:
+            if el[0] == 'poly':
+                _, pts, color, thickness = el
+                pts = np.asarray(pts, np.int32).reshape(-1, 2)
+                x, y = pts.min(axis=0) - thickness
+                w, h = pts.max(axis=0) - (x, y) + thickness + 1
+                mask = np.zeros((int(h), int(w)), np.uint8)
+                cv2.polylines(mask, [(pts - (x, y)).reshape(-1, 1, 2)], True, 255, thickness)
+                sprites.append((_sprite(mask, int(x), int(y)), color, 0, 0))
+            elif el[0] == 'text':
+                _, text, org, scale, color, thickness = el[:6]
+                aa = el[6] if len(el) > 6 else False  # cv2.putText's default line type
+                sprites.append((text_sprite(text, scale, thickness, aa), color, org[0], org[1]))
+            else:
+                raise ValueError(f"unknown overlay element {el[0]!r}")
+        return sprites
+
+    def set(self, key, spec, alpha=1.0):
+        """spec: [('poly', ((x, y), ...), color, thickness) | ('text', text, (x, y), scale, color, thickness[, aa])]"""
+        old = self.layers.get(key)
+        if old is not None and old[0] == spec and old[1] == alpha:
+            return  # unchanged: keep the rasterized sprites
+        self.layers[key] = (spec, alpha, self._rasterize(spec))
+
+    def remove(self, key):
+        self.layers.pop(key, None)
+
+    def clear(self):
+        self.layers.clear()
+
+    def render(self, frame):
+        """Composite every element into frame in place"""
+        touched = 0
+        for _, alpha, sprites in self.layers.values():
+            for sprite, color, dx, dy in sprites:
+                touched += blend_sprite(frame, sprite, color, alpha, dx, dy)
+        self.blended_px = touched
+        return frame
@@ -0,0 +1,351 @@
+"""
+pothole_detector.py
+Per-frame pothole pipeline from base2.py (ROI -> gray/CLAHE -> MOG2 -> edges +
+dark mask -> contour filters -> centroid tracking), packaged so the viewer,
+streaming server and offline tools can all drive the same detector.
+
+Puddle and speed-bump stages reuse the same gray_eq/edges computed once per
+frame and run their mask morphology at CLASS_MASK_SCALE resolution, so extra
+classes add a small fraction of the pothole stage's cost. Tracks are per class.
+
+With a WheelCorridor (wheel_corridor.py) the ROI is further cropped to the
+columns/rows the tyre paths cover, candidates outside both corridors are
+dropped, and each track carries the wheel(s) it will hit.
+"""
+
+import math
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from overlay import draw_label
+
+# TUNABLE PARAMETERS (start with these; tweak if many false+ or misses)
+MIN_AREA        = 6000
+MAX_AREA        = 40000
+DARK_MEAN_THRESH= 200
+CANNY_LOW       = 60
+CANNY_HIGH      = 140
+ASPECT_RATIO_MIN= 1.2
+ASPECT_RATIO_MAX= 3.2
+ROI_Y_START_FRAC = 0.35
+
+CONFIRM_FRAMES   = 3
+MAX_LOST_FRAMES  = 5
+MAX_MATCH_DIST   = 60
+
+# Extra terrain classes (share the pothole preprocessing)
+ENABLED_KINDS    = ('pothole', 'puddle', 'bump')
+CLASS_MASK_SCALE = 0.5    # puddle/bump masks are processed at this scale
+PUDDLE_BRIGHT_THRESH    = 215   # specular reflection in gray_eq
+PUDDLE_MIN_AREA         = 4000
+PUDDLE_MAX_AREA         = 60000
+PUDDLE_MAX_EDGE_DENSITY = 0.08  # reflections are smooth inside
+BUMP_MIN_WIDTH_FRAC     = 0.35  # a bump spans a good part of the lane
+BUMP_MIN_ASPECT         = 4.0
+BUMP_MAX_HEIGHT         = 120
+BUMP_MIN_EDGE_DENSITY   = 0.15  # painted stripes / raised lip give dense edges
+
+KINDS = ('pothole', 'puddle', 'bump')
+KIND_COLORS = {'pothole': (0, 0, 255), 'puddle': (212, 182, 6), 'bump': (11, 158, 245)}  # BGR
+
+# One result type for every class; (x, y, w, h) in ROI coordinates
+Detection = namedtuple('Detection', 'x y w h area mean_int kind')
+
+
+def centroid_from_bbox(bbox):
+    x, y, w, h = bbox
+    return (int(x + w/2), int(y + h/2))
+
+
+def euclid(a, b):
+    return math.hypot(a[0]-b[0], a[1]-b[1])
+
+
+def make_bg_sub():
+    # Background subtractor helps isolate transient road defects
+    return cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=50, detectShadows=False)
+
+
+class PotholeDetector:
+    """Stateful detector: call process(frame) once per frame in order"""
+
+    def __init__(self, width, height, bg_sub=None, corridor=None):
+        self.W = width
+        self.H = height
+        self.y_start = int(height * ROI_Y_START_FRAC)
+        # Processing window inside the ROI (the whole ROI without a corridor)
+        self.corridor = corridor
+        self.x0, self.x1 = (corridor.x0, corridor.x1) if corridor else (0, width)
+        self.r0 = corridor.r0 if corridor else 0
+        self.bg_sub = bg_sub if bg_sub is not None else make_bg_sub()
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (7,7))
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+        self.bump_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3))
+        self.small_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5,5))
+        # Per-instance thresholds, so threshold_tuner.py can adapt them at runtime
+        self.min_area, self.max_area = MIN_AREA, MAX_AREA
+        self.dark_thresh = DARK_MEAN_THRESH
+        self.canny_lo, self.canny_hi = CANNY_LOW, CANNY_HIGH
+        self.frame_stats = {}  # from the last detect(): luma, edge_density, contours, candidates
+
+        self.frame_idx = 0
+        # TRACKING state
+        self.next_track_id = 1
+        self.tracks = {}  # { 'kind':k, 'bbox':(x,y,w,h), 'centroid':(cx,cy), 'area':a, 'wheels':(...), 'first_seen':frame_idx, 'last_seen':frame_idx, 'consecutive':n, 'counted':bool }
+        self.track_events = []  # [(event, tid, tdata)] from the last frame: 'created' / 'confirmed' / 'lost'
+        self.confirmed_counts = dict.fromkeys(KINDS, 0)
+
+    @property
+    def unique_pothole_count(self):
+        return self.confirmed_counts['pothole']
+
+    @property
+    def roi_shape(self):
+        """Shape of the processed window (background model / analytics area)"""
+        return (self.H - self.y_start - self.r0, self.x1 - self.x0)
+
+    def prepare(self, frame):
+        """Stateless part of preprocessing: ROI crop + gray/blur/CLAHE, and edges"""
+        # 1) ROI crop (narrowed to the wheel corridors when configured)
+        roi = frame[self.y_start + self.r0:self.H, self.x0:self.x1]
+
+        # 2) Preprocess
+        gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+        gray_blur = cv2.GaussianBlur(gray, (7,7), 0)
+        gray_eq = self.clahe.apply(gray_blur)
+
+        # 4) Edges
+        edges = cv2.Canny(gray_eq, self.canny_lo, self.canny_hi)
+        return gray_eq, edges
+
+    def clean_fg(self, fg):
+        """Morphology applied to every raw foreground mask, whichever model produced it"""
+        fg = cv2.morphologyEx(fg, cv2.MORPH_OPEN, self.kernel, iterations=1)
+        return cv2.morphologyEx(fg, cv2.MORPH_CLOSE, self.kernel, iterations=2)
+
+    def preprocess(self, frame):
+        """ROI crop + gray/blur/CLAHE + background subtraction + edges"""
+        gray_eq, edges = self.prepare(frame)
+        # 3) Background subtraction
+        fg = self.clean_fg(self.bg_sub.apply(gray_eq))
+        return gray_eq, fg, edges
+
+    def detect(self, gray_eq, fg, edges):
+        """Dark-region + edge candidates filtered by area/aspect/solidity/intensity"""
+        kernel = self.kernel
+        dark_thresh = self.dark_thresh
+        _, dark = cv2.threshold(gray_eq, dark_thresh, 255, cv2.THRESH_BINARY_INV)
+
+        combined = cv2.bitwise_and(fg, dark)
+        combined = cv2.bitwise_or(combined, edges)
+        combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel, iterations=2)
+        combined = cv2.morphologyEx(combined, cv2.MORPH_OPEN, kernel, iterations=1)
+
+        # 5) Find contours and filter
+        contours, _ = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        detections = []
+        sized = 0
+        for cnt in contours:
+            area = cv2.contourArea(cnt)
+            if area < self.min_area or area > self.max_area:
+                continue
+            sized += 1
+            x, y, w, h = cv2.boundingRect(cnt)
+            ar = w / float(h + 1e-6)
+            if not (ASPECT_RATIO_MIN <= ar <= ASPECT_RATIO_MAX):
+                continue
+            bbox_area = w * h
+            solidity = float(area) / (bbox_area + 1e-6)
+            if solidity < 0.2:
+                continue
+            roi_patch = gray_eq[y:y+h, x:x+w]
+            mean_int = float(np.mean(roi_patch)) if roi_patch.size else 255
+            if mean_int > dark_thresh + 20:
+                continue
+            detections.append(Detection(x, y, w, h, area, mean_int, 'pothole'))
+        self.frame_stats = {'luma': cv2.mean(gray_eq)[0], 'edge_density': cv2.countNonZero(edges) / float(edges.size),
+                            'contours': len(contours), 'candidates': sized}
+        return detections
+
+    def _small_contours(self, mask):
+        """Contours of a half-resolution mask, as full-ROI (x, y, w, h, area)"""
+        s = CLASS_MASK_SCALE
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        for cnt in contours:
+            x, y, w, h = cv2.boundingRect(cnt)
+            yield int(x / s), int(y / s), int(w / s), int(h / s), cv2.contourArea(cnt) / (s * s)
+
+    def detect_puddles(self, gray_small, edges_small, gray_eq):
+        """Bright, smooth (specular) regions"""
+        _, bright = cv2.threshold(gray_small, PUDDLE_BRIGHT_THRESH, 255, cv2.THRESH_BINARY)
+        bright = cv2.morphologyEx(bright, cv2.MORPH_CLOSE, self.small_kernel, iterations=2)
+        s = CLASS_MASK_SCALE
+        detections = []
+        for x, y, w, h, area in self._small_contours(bright):
+            if area < PUDDLE_MIN_AREA or area > PUDDLE_MAX_AREA or w < h:
+                continue
+            sx, sy, sw, sh = int(x * s), int(y * s), max(1, int(w * s)), max(1, int(h * s))
+            edge_density = cv2.countNonZero(edges_small[sy:sy+sh, sx:sx+sw]) / float(sw * sh)
+            if edge_density > PUDDLE_MAX_EDGE_DENSITY:
+                continue
+            mean_int = float(np.mean(gray_eq[y:y+h, x:x+w]))
+            detections.append(Detection(x, y, w, h, area, mean_int, 'puddle'))
+        return detections
+
+    def detect_bumps(self, edges_small, gray_eq):
+        """Wide, flat bands of dense horizontal edges across the lane"""
+        band = cv2.morphologyEx(edges_small, cv2.MORPH_CLOSE, self.bump_kernel, iterations=2)
+        s = CLASS_MASK_SCALE
+        detections = []
+        for x, y, w, h, area in self._small_contours(band):
+            if w < BUMP_MIN_WIDTH_FRAC * self.W or h > BUMP_MAX_HEIGHT:
+                continue
+            if w / float(h + 1e-6) < BUMP_MIN_ASPECT:
+                continue
+            sx, sy, sw, sh = int(x * s), int(y * s), max(1, int(w * s)), max(1, int(h * s))
+            edge_density = cv2.countNonZero(edges_small[sy:sy+sh, sx:sx+sw]) / float(sw * sh)
+            if edge_density < BUMP_MIN_EDGE_DENSITY:
+                continue
+            mean_int = float(np.mean(gray_eq[y:y+h, x:x+w]))
+            detections.append(Detection(x, y, w, h, area, mean_int, 'bump'))
+        return detections
+
+    def detect_all(self, gray_eq, fg, edges):
+        """Every enabled class from one set of preprocessing outputs, in ROI coordinates"""
+        detections = self._detect_window(gray_eq, fg, edges)
+        if self.x0 or self.r0:
+            detections = [d._replace(x=d.x + self.x0, y=d.y + self.r0) for d in detections]
+        if self.corridor:
+            detections = [d for d in detections if self.corridor.wheels_for(d.x, d.y, d.w, d.h)]
+        return detections
+
+    def _wheels(self, bbox):
+        return self.corridor.wheels_for(*bbox) if self.corridor else ()
+
+    def _detect_window(self, gray_eq, fg, edges):
+        detections = self.detect(gray_eq, fg, edges) if 'pothole' in ENABLED_KINDS else []
+        if 'puddle' in ENABLED_KINDS or 'bump' in ENABLED_KINDS:
+            gray_small = cv2.resize(gray_eq, (0, 0), fx=CLASS_MASK_SCALE, fy=CLASS_MASK_SCALE,
+                                    interpolation=cv2.INTER_AREA)
+            # INTER_AREA keeps thin edges alive (any non-zero = edge) when shrinking
+            edges_small = cv2.resize(edges, (0, 0), fx=CLASS_MASK_SCALE, fy=CLASS_MASK_SCALE,
+                                     interpolation=cv2.INTER_AREA)
+            if 'puddle' in ENABLED_KINDS:
+                detections += self.detect_puddles(gray_small, edges_small, gray_eq)
+            if 'bump' in ENABLED_KINDS:
+                detections += self.detect_bumps(edges_small, gray_eq)
+        return detections
+
+    def update_tracks(self, detections):
+        """Match detections to tracks; returns [(tid, tdata)] confirmed on this frame"""
+        frame_idx = self.frame_idx
+        tracks = self.tracks
+        events = self.track_events = []
+
+        # TRACKING: match detections -> existing tracks (centroid distance)
+        unmatched_dets = set(range(len(detections)))
+        matched_tracks = set()
+        det_centroids = [centroid_from_bbox((d.x, d.y, d.w, d.h)) for d in detections]
+
+        track_items = list(tracks.items())  # (track_id, data)
+        # For each detection, try to find the closest track of the same class
+        for di, det_c in enumerate(det_centroids):
+            kind = detections[di].kind
+            best_tid = None
+            best_dist = float('inf')
+            for tid, tdata in track_items:
+                if tid in matched_tracks or tdata['kind'] != kind:
+                    continue
+                dist = euclid(det_c, tdata['centroid'])
+                if dist < best_dist:
+                    best_dist = dist
+                    best_tid = tid
+            if best_tid is not None and best_dist <= MAX_MATCH_DIST:
+                x, y, w, h, area, mean_int, kind = detections[di]
+                tracks[best_tid]['bbox'] = (x, y, w, h)
+                tracks[best_tid]['centroid'] = det_centroids[di]
+                tracks[best_tid]['area'] = area
+                tracks[best_tid]['wheels'] = self._wheels((x, y, w, h))
+                # If last_seen was previous frame, increment consecutive, else set to 1
+                if frame_idx - tracks[best_tid]['last_seen'] == 1:
+                    tracks[best_tid]['consecutive'] += 1
+                else:
+                    tracks[best_tid]['consecutive'] = 1
+                tracks[best_tid]['last_seen'] = frame_idx
+                matched_tracks.add(best_tid)
+                unmatched_dets.discard(di)
+
+        # Create new tracks for unmatched detections
+        for di in sorted(unmatched_dets):
+            x, y, w, h, area, mean_int, kind = detections[di]
+            cid = self.next_track_id
+            self.next_track_id += 1
+            tracks[cid] = {
+                'kind': kind,
+                'bbox': (x, y, w, h),
+                'centroid': det_centroids[di],
+                'area': area,
+                'wheels': self._wheels((x, y, w, h)),
+                'first_seen': frame_idx,
+                'last_seen': frame_idx,
+                'consecutive': 1,
+                'counted': False
+            }
+            events.append(('created', cid, tracks[cid]))
+
+        # Check confirmation: if any track reached CONFIRM_FRAMES and not yet counted -> count it
+        confirmed = []
+        for tid, tdata in list(tracks.items()):
+            if (not tdata['counted']) and (tdata['consecutive'] >= CONFIRM_FRAMES):
+                tdata['counted'] = True
+                self.confirmed_counts[tdata['kind']] += 1
+                confirmed.append((tid, tdata))
+                events.append(('confirmed', tid, tdata))
+
+        # Remove stale tracks
+        to_delete = [tid for tid, tdata in tracks.items() if frame_idx - tdata['last_seen'] > MAX_LOST_FRAMES]
+        for tid in to_delete:
+            events.append(('lost', tid, tracks.pop(tid)))
+        return confirmed
+
+    def process(self, frame):
+        """Run the full pipeline on one frame -> (detections, confirmed)"""
+        return self.process_prepared(*self.preprocess(frame))
+
+    def process_prepared(self, gray_eq, fg, edges):
+        """Detection + tracking for preprocessed inputs (e.g. fg from offline_background.py)"""
+        self.frame_idx += 1
+        detections = self.detect_all(gray_eq, fg, edges)
+        confirmed = self.update_tracks(detections)
+        return detections, confirmed
+
+    def track_detections(self, detections):
+        """Tracking only, for detections computed elsewhere (one call per frame, in order)"""
+        self.frame_idx += 1
+        return self.update_tracks(detections)
+
+    def draw(self, frame, detections):
+        """Draw detections (class colour) and active tracks (green counted / orange pending)"""
+        y_start = self.y_start
+        if self.corridor:
+            self.corridor.draw(frame)
+        # 6) Draw detections (convert coords back to full frame)
+        for (x, y, w, h, area, mean_int, kind) in detections:
+            top_left = (x, y + y_start)
+            bottom_right = (x + w, y + h + y_start)
+            color = KIND_COLORS[kind]
+            cv2.rectangle(frame, top_left, bottom_right, color, 2)
+            label = f"{kind.capitalize()}? A={int(area)} I={int(mean_int)}"
+            draw_label(frame, label, (top_left[0], max(top_left[1]-6,0)), 0.45, color)
+
+        for tid, tdata in self.tracks.items():
+            x, y, w, h = tdata['bbox']
+            tl = (int(x), int(y + y_start))
+            br = (int(x + w), int(y + h + y_start))
+            color = (0,255,0) if tdata['counted'] else (255,165,0)  # green if counted, orange otherwise
+            cv2.rectangle(frame, tl, br, color, 1)
+            # Track labels repeat from frame to frame; draw_label reuses their rasterization
+            draw_label(frame, f"id{tid} c{tdata['consecutive']}", (tl[0], max(tl[1]-8,0)), 0.45, color)
+        return frame
@@ -0,0 +1,193 @@
+"""
+pothole_map.py
+Geo-indexed pothole map shared across drives and vehicles.
+
+Confirmed detections are placed using a GPS sidecar track (CSV: t,lat,lon with
+t in seconds from video start). Observations within MERGE_RADIUS_M of a known
+pothole are merged into it instead of being counted again. A grid of roughly
+MERGE_RADIUS_M cells keeps nearest / along-route lookups to a handful of
+buckets, well under a millisecond.
+"""
+
+import csv
+import json
+import math
+import os
+
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+MERGE_RADIUS_M = 4.0
+MAP_FILE = "pothole_map.json"
+# -----------------------
+
+EARTH_R = 6371000.0
+M_PER_DEG = math.pi * EARTH_R / 180.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_R * math.asin(math.sqrt(a))
+
+
+def load_gps_track(path):
+    """Sidecar CSV (t,lat,lon) -> (t, lat, lon) arrays sorted by t"""
+    rows = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                rows.append((float(row[0]), float(row[1]), float(row[2])))
+            except (ValueError, IndexError):
+                continue  # header / malformed line
+    rows.sort()
+    arr = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    return arr[:, 0], arr[:, 1], arr[:, 2]
+
+
+def position_at(track, t):
+    """Linearly interpolated (lat, lon) at time t, or None outside the track"""
+    ts, lats, lons = track
+    if not len(ts) or t < ts[0] or t > ts[-1]:
+        return None
+    return float(np.interp(t, ts, lats)), float(np.interp(t, ts, lons))
+
+
+class PotholeMap:
+    """Grid-hashed set of merged pothole observations"""
+
+    def __init__(self, cell_m=MERGE_RADIUS_M, merge_radius_m=MERGE_RADIUS_M):
+        self.cell_deg = cell_m / M_PER_DEG
+        self.merge_radius_m = merge_radius_m
+        self.potholes = {}  # id -> {'lat','lon','count','vehicles','first_seen','last_seen','max_area'}
+        self.grid = {}      # (row, col) -> set of ids
+        self.next_id = 1
+
+    # -- grid --
+
+    def _row(self, lat):
+        return math.floor(lat / self.cell_deg)
+
+    def _col(self, row, lon):
+        # Longitude cells shrink with latitude; scale by the row's centre latitude
+        lat_c = (row + 0.5) * self.cell_deg
+        return math.floor(lon * math.cos(math.radians(lat_c)) / self.cell_deg)
+
+    def _key(self, lat, lon):
+        row = self._row(lat)
+        return row, self._col(row, lon)
+
+    def _cells_around(self, lat, lon, radius_m):
+        reach = int(math.ceil(radius_m / (self.cell_deg * M_PER_DEG)))
+        row0 = self._row(lat)
+        for row in range(row0 - reach, row0 + reach + 1):
+            col0 = self._col(row, lon)
+            for col in range(col0 - reach, col0 + reach + 1):
+                ids = self.grid.get((row, col))
+                if ids:
+                    yield ids
+
+    def _insert(self, pid):
+        p = self.potholes[pid]
+        self.grid.setdefault(self._key(p['lat'], p['lon']), set()).add(pid)
+
+    def _remove(self, pid):
+        p = self.potholes[pid]
+        key = self._key(p['lat'], p['lon'])
+        self.grid[key].discard(pid)
+        if not self.grid[key]:
+            del self.grid[key]
+
+    # -- queries --
+
+    def nearest(self, lat, lon, max_radius_m=50.0):
+        """(id, distance_m) of the closest pothole within max_radius_m, or None"""
+        best = None
+        for ids in self._cells_around(lat, lon, max_radius_m):
+            for pid in ids:
+                p = self.potholes[pid]
+                d = haversine_m(lat, lon, p['lat'], p['lon'])
+                if d <= max_radius_m and (best is None or d < best[1]):
+                    best = (pid, d)
+        return best
+
+    def within_route(self, route, corridor_m=5.0):
+        """Potholes within corridor_m of a polyline [(lat, lon), ...], ordered along the route"""
+        found = {}
+        along = 0.0
+        for (lat1, lon1), (lat2, lon2) in zip(route, route[1:]):
+            seg_len = haversine_m(lat1, lon1, lat2, lon2)
+            steps = max(1, int(seg_len / (self.cell_deg * M_PER_DEG)))
+            coslat = math.cos(math.radians((lat1 + lat2) / 2))
+            # Local flat projection of the segment (metres)
+            sx, sy = (lon2 - lon1) * coslat * M_PER_DEG, (lat2 - lat1) * M_PER_DEG
+            seg_sq = sx * sx + sy * sy or 1e-9
+            seen = set()
+            for i in range(steps + 1):
+                f = i / steps
+                for ids in self._cells_around(lat1 + f * (lat2 - lat1), lon1 + f * (lon2 - lon1), corridor_m):
+                    for pid in ids - seen:
+                        seen.add(pid)
+                        p = self.potholes[pid]
+                        px, py = (p['lon'] - lon1) * coslat * M_PER_DEG, (p['lat'] - lat1) * M_PER_DEG
+                        u = min(1.0, max(0.0, (px * sx + py * sy) / seg_sq))
+                        d = math.hypot(px - u * sx, py - u * sy)
+                        if d <= corridor_m and pid not in found:
+                            found[pid] = along + u * seg_len
+            along += seg_len
+        return sorted(found.items(), key=lambda it: it[1])
+
+    # -- ingest --
+
+    def ingest(self, lat, lon, t=None, vehicle_id=None, area=0.0):
+        """Add one confirmed observation; returns (pothole_id, is_new)"""
+        hit = self.nearest(lat, lon, self.merge_radius_m)
+        if hit is None:
+            pid = self.next_id
+            self.next_id += 1
+            self.potholes[pid] = {'lat': lat, 'lon': lon, 'count': 1,
+                                  'vehicles': [vehicle_id] if vehicle_id else [],
+                                  'first_seen': t, 'last_seen': t, 'max_area': float(area)}
+            self._insert(pid)
+            return pid, True
+
+        pid = hit[0]
+        p = self.potholes[pid]
+        self._remove(pid)
+        n = p['count']
+        p['lat'] = (p['lat'] * n + lat) / (n + 1)
+        p['lon'] = (p['lon'] * n + lon) / (n + 1)
+        p['count'] = n + 1
+        if vehicle_id and vehicle_id not in p['vehicles']:
+            p['vehicles'].append(vehicle_id)
+        if t is not None:
+            p['last_seen'] = t
+        p['max_area'] = max(p['max_area'], float(area))
+        self._insert(pid)
+        return pid, False
+
+    # -- persistence --
+
+    def save(self, path=MAP_FILE):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({'merge_radius_m': self.merge_radius_m, 'next_id': self.next_id,
+                       'potholes': {str(k): v for k, v in self.potholes.items()}}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=MAP_FILE):
+        m = cls()
+        if not os.path.exists(path):
+            return m
+        with open(path) as f:
+            data = json.load(f)
+        m.merge_radius_m = data.get('merge_radius_m', MERGE_RADIUS_M)
+        m.next_id = data.get('next_id', 1)
+        for k, v in data.get('potholes', {}).items():
+            m.potholes[int(k)] = v
+            m._insert(int(k))
+        return m
@@ -0,0 +1,276 @@
+"""
+replay.py
+Deterministic replay / simulation harness for the pothole detector.
+
+Feeds recorded video or a synthetic road (a Python take on RoadSimulator in
+live-cam.js, with ground truth) into PotholeDetector at 1x, Nx or max speed,
+optionally dropping frames and jittering their arrival, and reports latency:
+
+    pipeline  capture of the confirming frame -> signal (wall clock)
+    onset     obstacle entering the ROI -> signal (road time; synthetic only)
+
+A capture thread emits frames on the scheduled clock into a one-slot queue, as
+a camera would, so a detector that falls behind shows up as overruns. At max
+speed the queue blocks instead and the run is fully reproducible for a seed.
+
+    python replay.py --synthetic --rate 1 --drop 0.05 --jitter-ms 8 --budget-ms 50
+    python replay.py pothole_road_sample1.mp4 --rate 0
+"""
+
+import argparse
+import json
+import queue
+import random
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pothole_detector import PotholeDetector
+
+# -----------------------
+# Configuration
+# -----------------------
+SYNTH_SIZE = (1280, 720)
+SYNTH_FPS = 30.0
+SYNTH_FRAMES = 900
+SYNTH_SPEED_PX = 9            # road scroll per frame at the bottom of the image
+SYNTH_GAP_FRAMES = (45, 110)  # frames between obstacles (RoadSimulator: 2-5 s)
+MATCH_DIST = 120              # confirmed bbox centre -> ground-truth centre (px)
+# -----------------------
+
+
+class VideoSource:
+    """Recorded frames; no ground truth"""
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise SystemExit("Cannot open video file: " + path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def frames(self):
+        """Yields (frame, ground_truth) with ground_truth None"""
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            yield frame, None
+        self.cap.release()
+
+
+class SyntheticRoad:
+    """Textured road scrolling toward the camera with seeded potholes, puddles and bumps"""
+
+    def __init__(self, seed=0, size=SYNTH_SIZE, n_frames=SYNTH_FRAMES, kinds=('pothole', 'puddle', 'bump')):
+        self.rng = np.random.default_rng(seed)
+        self.size = size
+        self.fps = SYNTH_FPS
+        self.n_frames = n_frames
+        self.kinds = kinds
+        w, h = size
+        # Fixed asphalt texture, scrolled each frame
+        noise = self.rng.normal(118, 9, (h * 2, w)).astype(np.float32)
+        self.texture = cv2.GaussianBlur(noise, (0, 0), 1.5).clip(0, 255).astype(np.uint8)
+        self.obstacles = []
+        self.next_id = 1
+
+    def _spawn(self, frame_no):
+        w, _ = self.size
+        kind = self.kinds[int(self.rng.integers(len(self.kinds)))]
+        if kind == 'bump':
+            ow, oh = int(w * 0.5), 40
+        elif kind == 'puddle':
+            ow, oh = int(self.rng.integers(180, 260)), int(self.rng.integers(70, 100))
+        else:
+            ow, oh = int(self.rng.integers(150, 220)), int(self.rng.integers(70, 100))
+        cx = int(w * (0.3 + 0.4 * self.rng.random()))
+        self.obstacles.append({'id': self.next_id, 'kind': kind, 'cx': cx, 'y': -oh, 'w': ow, 'h': oh,
+                               'spawn': frame_no})
+        self.next_id += 1
+
+    def _draw(self, img, ob):
+        x0, y0 = ob['cx'] - ob['w'] // 2, int(ob['y'])
+        if ob['kind'] == 'pothole':
+            cv2.ellipse(img, (ob['cx'], y0 + ob['h'] // 2), (ob['w'] // 2, ob['h'] // 2), 0, 0, 360, (38, 38, 38), -1)
+            cv2.ellipse(img, (ob['cx'], y0 + ob['h'] // 2), (ob['w'] // 2, ob['h'] // 2), 0, 0, 360, (70, 70, 70), 3)
+        elif ob['kind'] == 'puddle':
+            cv2.ellipse(img, (ob['cx'], y0 + ob['h'] // 2), (ob['w'] // 2, ob['h'] // 2), 0, 0, 360, (250, 250, 250), -1)
+        else:
+            for i, sx in enumerate(range(x0, x0 + ob['w'], 24)):
+                color = (0, 215, 255) if i % 2 == 0 else (20, 20, 20)
+                cv2.rectangle(img, (sx, y0), (min(sx + 24, x0 + ob['w']), y0 + ob['h']), color, -1)
+
+    def frames(self):
+        """Yields (frame, ground_truth) where ground_truth lists visible obstacles (full-frame coords)"""
+        w, h = self.size
+        next_spawn = 10
+        offset = 0
+        for frame_no in range(1, self.n_frames + 1):
+            if frame_no >= next_spawn:
+                self._spawn(frame_no)
+                next_spawn = frame_no + int(self.rng.integers(*SYNTH_GAP_FRAMES))
+            offset = (offset + SYNTH_SPEED_PX) % h
+            gray = self.texture[h - offset:2 * h - offset]
+            img = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+            # Dashed centre line
+            for y in range(-100 + offset % 100, h, 100):
+                cv2.line(img, (w // 2, y), (w // 2, y + 50), (150, 150, 150), 4)
+
+            truth = []
+            for ob in self.obstacles:
+                ob['y'] += SYNTH_SPEED_PX
+                self._draw(img, ob)
+                truth.append({'id': ob['id'], 'kind': ob['kind'], 'cx': ob['cx'], 'cy': int(ob['y'] + ob['h'] / 2),
+                              'top': int(ob['y']), 'bottom': int(ob['y'] + ob['h'])})
+            self.obstacles = [ob for ob in self.obstacles if ob['y'] < h]
+            yield img, truth
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+class ReplayEngine:
+    """Paced capture thread -> detector, with injected drops/jitter and latency accounting"""
+
+    def __init__(self, source, rate=1.0, drop=0.0, jitter_ms=0.0, seed=0):
+        self.source = source
+        self.rate = rate  # 0 = as fast as the detector can go
+        self.drop = drop
+        self.jitter = jitter_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.stats = {'emitted': 0, 'dropped': 0, 'overrun': 0, 'processed': 0}
+
+    def _capture(self, q, done):
+        interval = 1.0 / (self.source.fps * self.rate) if self.rate > 0 else 0.0
+        t0 = time.perf_counter()
+        for n, (frame, truth) in enumerate(self.source.frames()):
+            if interval:
+                due = t0 + n * interval + self.rng.uniform(0.0, self.jitter)
+                time.sleep(max(0.0, due - time.perf_counter()))
+            if self.rng.random() < self.drop:
+                self.stats['dropped'] += 1
+                continue
+            item = (n + 1, time.perf_counter(), frame, truth)
+            self.stats['emitted'] += 1
+            if interval:
+                try:
+                    q.put_nowait(item)
+                except queue.Full:
+                    # A live camera does not wait: replace the stale frame
+                    try:
+                        q.get_nowait()
+                        self.stats['overrun'] += 1
+                    except queue.Empty:
+                        pass
+                    q.put_nowait(item)
+            else:
+                q.put(item)
+        done.set()
+
+    def run(self):
+        w, h = self.source.size
+        detector = PotholeDetector(w, h)
+        q = queue.Queue(maxsize=1)
+        done = threading.Event()
+        threading.Thread(target=self._capture, args=(q, done), daemon=True).start()
+
+        pipeline_ms, onset_ms, process_ms = [], [], []
+        signals, false_signals = [], 0
+        onsets = {}   # ground-truth id -> (frame_no, kind)
+        matched = set()
+        while not (done.is_set() and q.empty()):
+            try:
+                frame_no, t_cap, frame, truth = q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            t_start = time.perf_counter()
+            if not self.rate:
+                t_cap = t_start  # the blocking put already waited for the detector
+            _, confirmed = detector.process(frame)
+            process_ms.append((time.perf_counter() - t_start) * 1000)
+            self.stats['processed'] += 1
+
+            for ob in truth or ():
+                if ob['id'] not in onsets and ob['bottom'] >= detector.y_start:
+                    onsets[ob['id']] = (frame_no, ob['kind'])
+
+            for tid, tdata in confirmed:
+                t_signal = time.perf_counter()
+                lat = (t_signal - t_cap) * 1000
+                pipeline_ms.append(lat)
+                signals.append({'frame': frame_no, 'kind': tdata['kind'], 'track_id': tid,
+                                'pipeline_ms': round(lat, 2)})
+                if truth is None:
+                    continue
+                x, y, bw, bh = tdata['bbox']
+                cx, cy = x + bw / 2, y + detector.y_start + bh / 2
+                cands = [ob for ob in truth if ob['kind'] == tdata['kind'] and ob['id'] not in matched
+                         and np.hypot(ob['cx'] - cx, ob['cy'] - cy) <= MATCH_DIST]
+                if not cands:
+                    false_signals += 1
+                    continue
+                ob = min(cands, key=lambda o: np.hypot(o['cx'] - cx, o['cy'] - cy))
+                matched.add(ob['id'])
+                onset_frame = onsets.get(ob['id'], (frame_no,))[0]
+                road_ms = (frame_no - onset_frame) * 1000.0 / self.source.fps + lat
+                onset_ms.append(road_ms)
+                signals[-1]['onset_ms'] = round(road_ms, 2)
+
+        report = {
+            'rate': self.rate or 'max', 'drop': self.drop, 'jitter_ms': self.jitter * 1000,
+            **self.stats,
+            'signals': len(signals),
+            'process_ms': {'p50': percentile(process_ms, 50), 'p99': percentile(process_ms, 99),
+                           'max': max(process_ms, default=None)},
+            'pipeline_ms': {'p50': percentile(pipeline_ms, 50), 'p95': percentile(pipeline_ms, 95),
+                            'p99': percentile(pipeline_ms, 99), 'max': max(pipeline_ms, default=None)},
+            'events': signals,
+        }
+        if onsets or onset_ms:
+            report['ground_truth'] = {
+                'obstacles': len(onsets), 'detected': len(matched),
+                'missed': len(set(onsets) - matched), 'false_signals': false_signals,
+                'onset_ms': {'p50': percentile(onset_ms, 50), 'p95': percentile(onset_ms, 95),
+                             'max': max(onset_ms, default=None)},
+            }
+        return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay frames into the pothole detector and measure latency")
+    ap.add_argument("video", nargs="?", help="recorded video (omit with --synthetic)")
+    ap.add_argument("--synthetic", action="store_true", help="use the synthetic road generator")
+    ap.add_argument("--frames", type=int, default=SYNTH_FRAMES, help="synthetic frames to generate")
+    ap.add_argument("--rate", type=float, default=1.0, help="playback rate; 0 = max speed")
+    ap.add_argument("--drop", type=float, default=0.0, help="probability of dropping each frame")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="max extra delay added to each frame")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--budget-ms", type=float, help="fail if p99 pipeline latency exceeds this")
+    ap.add_argument("--json", help="write the full report here")
+    args = ap.parse_args()
+
+    if args.synthetic:
+        source = SyntheticRoad(seed=args.seed, n_frames=args.frames)
+    elif args.video:
+        source = VideoSource(args.video)
+    else:
+        ap.error("give a video path or --synthetic")
+
+    report = ReplayEngine(source, args.rate, args.drop, args.jitter_ms, args.seed).run()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=1)
+    summary = {k: v for k, v in report.items() if k != 'events'}
+    print(json.dumps(summary, indent=1))
+
+    p99 = report['pipeline_ms']['p99']
+    if args.budget_ms is not None and p99 is not None and p99 > args.budget_ms:
+        raise SystemExit(f"FAIL: p99 pipeline latency {p99:.1f} ms > budget {args.budget_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
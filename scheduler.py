@@ -0,0 +1,180 @@
+"""
+scheduler.py
+Deadline-aware runtime scheduler for the pothole, OCR and speech workloads.
+
+Streams are registered with a task class:
+    critical     pothole frames: never skipped, always run in order, and one
+                 worker is reserved for them so a long OCR inference can never
+                 hold the suspension signal back
+    best_effort  sign OCR: admitted at every `stride`-th frame, newest frame wins
+    background   speech: runs when nothing else is waiting
+
+After every critical task the scheduler compares its latency (capture ->
+finished) with the deadline. Over DEGRADE_AT of the budget it doubles the
+stride of best-effort streams (OCR frequency drops first); after
+RECOVER_AFTER tasks under RECOVER_AT it halves it again, with at most one
+degradation step per ADAPT_COOLDOWN_SEC. deadline_misses counts every task
+that finished (or would have started) past its deadline.
+"""
+
+import threading
+import time
+from collections import deque
+
+# -----------------------
+# Configuration
+# -----------------------
+WORKERS = 3
+RESERVED_CRITICAL = 1   # workers that only ever run critical tasks
+DEGRADE_AT = 0.8        # critical latency / deadline that triggers degradation
+RECOVER_AT = 0.5
+RECOVER_AFTER = 30      # consecutive relaxed critical tasks before stepping back up
+ADAPT_COOLDOWN_SEC = 0.5  # let a stride change take effect before judging again
+MAX_STRIDE = 32
+# -----------------------
+
+TASK_CLASSES = {
+    # rank: lower runs first; skippable: frames may be dropped by admission/deadline
+    'critical': {'rank': 0, 'skippable': False},
+    'best_effort': {'rank': 1, 'skippable': True},
+    'background': {'rank': 2, 'skippable': True},
+}
+
+
+class RealtimeScheduler:
+    """Shared workers with task classes, per-task deadlines, admission control and degradation"""
+
+    def __init__(self, workers=WORKERS, reserved_critical=RESERVED_CRITICAL):
+        self.n_workers = max(workers, reserved_critical + 1)
+        self.reserved = reserved_critical
+        self.cond = threading.Condition()
+        self.streams = {}  # name -> scheduling state
+        self.stop_evt = threading.Event()
+        self.deadline_misses = 0
+        self.relaxed = 0
+        self.last_adapt = 0.0
+        self.decisions = []  # (time, stream, old_stride, new_stride)
+
+    def register(self, name, handler, task_class='best_effort', deadline_ms=100, stride=1, serial=True):
+        """handler(payload, ts, seq); serial streams never run two tasks at once"""
+        if task_class not in TASK_CLASSES:
+            raise ValueError(f"unknown task class {task_class!r}")
+        self.streams[name] = {'handler': handler, 'cls': task_class, 'rank': TASK_CLASSES[task_class]['rank'],
+                              'deadline': deadline_ms / 1000.0, 'serial': serial, 'base_stride': stride,
+                              'stride': stride, 'pending': deque(), 'running': 0, 'submitted': 0,
+                              'processed': 0, 'skipped': 0, 'missed': 0, 'latency_ms': 0.0}
+
+    # -- admission --
+
+    def submit(self, name, payload, ts=None, seq=None):
+        """Queue one task; returns False when admission control refused it"""
+        s = self.streams[name]
+        ts = time.monotonic() if ts is None else ts
+        with self.cond:
+            s['submitted'] += 1
+            if TASK_CLASSES[s['cls']]['skippable']:
+                if (s['submitted'] - 1) % s['stride']:
+                    s['skipped'] += 1
+                    return False
+                if s['cls'] == 'best_effort' and s['pending']:
+                    s['skipped'] += len(s['pending'])  # newest frame wins
+                    s['pending'].clear()
+            s['pending'].append((ts + s['deadline'], ts, seq, payload))
+            self.cond.notify_all()
+        return True
+
+    # -- dispatch --
+
+    def _next_job(self, critical_only):
+        best = None
+        for name, s in self.streams.items():
+            if not s['pending'] or (s['serial'] and s['running']):
+                continue
+            if critical_only and s['cls'] != 'critical':
+                continue
+            key = (s['rank'], s['pending'][0][0])
+            if best is None or key < best[0]:
+                best = (key, name)
+        return best[1] if best else None
+
+    def _worker(self, critical_only):
+        while True:
+            with self.cond:
+                name = self._next_job(critical_only)
+                while name is None and not self.stop_evt.is_set():
+                    self.cond.wait(0.2)
+                    name = self._next_job(critical_only)
+                if name is None:
+                    return
+                s = self.streams[name]
+                deadline, ts, seq, payload = s['pending'].popleft()
+                s['running'] += 1
+
+            late = time.monotonic() > deadline
+            ran = not (late and TASK_CLASSES[s['cls']]['skippable'])
+            try:
+                if ran:
+                    s['handler'](payload, ts, seq)
+            except Exception as e:
+                print(f"[{name}] task error: {e}")
+            finally:
+                done = time.monotonic()
+                with self.cond:
+                    s['running'] -= 1
+                    s['processed' if ran else 'skipped'] += 1
+                    if late or done > deadline:
+                        s['missed'] += 1
+                        self.deadline_misses += 1
+                    if s['cls'] == 'critical':
+                        s['latency_ms'] = (done - ts) * 1000
+                        self._adapt((done - ts) / s['deadline'])
+                    self.cond.notify_all()
+
+    def _adapt(self, load):
+        """Graceful degradation driven by critical latency (called under the lock)"""
+        if load > DEGRADE_AT:
+            self.relaxed = 0
+            if time.monotonic() - self.last_adapt < ADAPT_COOLDOWN_SEC:
+                return
+            factor = 2
+        elif load < RECOVER_AT:
+            self.relaxed += 1
+            if self.relaxed < RECOVER_AFTER:
+                return
+            self.relaxed = 0
+            factor = 0.5
+        else:
+            self.relaxed = 0
+            return
+        self.last_adapt = time.monotonic()
+        for name, s in self.streams.items():
+            if s['cls'] != 'best_effort':
+                continue
+            new = int(min(MAX_STRIDE, max(s['base_stride'], s['stride'] * factor)))
+            if new != s['stride']:
+                self.decisions.append((time.time(), name, s['stride'], new))
+                print(f"[scheduler] {name} stride {s['stride']} -> {new} (critical load {load:.2f})")
+                s['stride'] = new
+
+    # -- lifecycle --
+
+    def start(self):
+        for i in range(self.n_workers):
+            threading.Thread(target=self._worker, args=(i < self.reserved,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stop_evt.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def idle(self):
+        with self.cond:
+            return all(not s['pending'] and not s['running'] for s in self.streams.values())
+
+    def stats(self):
+        with self.cond:
+            out = {name: {k: s[k] for k in ('cls', 'stride', 'submitted', 'processed', 'skipped', 'missed')}
+                   for name, s in self.streams.items()}
+            out['deadline_misses'] = self.deadline_misses
+            return out
@@ -0,0 +1,72 @@
+"""
+stable_text.py
+Incremental voting over the last few OCR results. Counts are only touched when
+a result is pushed or evicted, so reading the stable text per frame is O(1).
+Voting is per token, so one misread word does not reset agreement on the rest.
+The stable text is always taken from one result in the window (its agreed
+tokens, in its order), so words from two different signs are never merged;
+tokens that leave the window stop counting and the text can shrink or clear.
+"""
+
+from collections import deque
+
+DETECTION_HISTORY = 5
+REQUIRED_AGREE = 2
+
+
+class StableTextVoter:
+    """Sliding-window token vote; fires on_change listeners when stable text changes"""
+
+    def __init__(self, history=DETECTION_HISTORY, required=REQUIRED_AGREE):
+        self.history = history
+        self.required = required
+        self.window = deque()
+        self.counts = {}     # token -> results in window containing it
+        self.text = ""
+        self.listeners = []
+
+    def on_change(self, fn):
+        """Register fn(text) to be called whenever the stable text changes ("" when it clears)"""
+        self.listeners.append(fn)
+        return fn
+
+    def clear(self):
+        self.window.clear()
+        self.counts.clear()
+        self.text = ""
+
+    def _candidate(self):
+        """Agreed tokens of the window result with the most support (newest wins ties)"""
+        best, best_score = "", 0
+        for entry in self.window:
+            agreed = [tok for tok in entry if self.counts[tok] >= self.required]
+            score = sum(self.counts[tok] for tok in agreed)
+            if agreed and score >= best_score:
+                best, best_score = " ".join(agreed), score
+        return best
+
+    def push(self, tokens):
+        """Add one OCR result (ordered tokens).
+
+        Returns the new stable text if it changed, "" if it cleared (nothing
+        to announce, but the sign is gone), or None if it did not change.
+        """
+        entry = list(dict.fromkeys(tokens))
+        if len(self.window) >= self.history:
+            for tok in self.window.popleft():
+                n = self.counts[tok] - 1
+                if n:
+                    self.counts[tok] = n
+                else:
+                    del self.counts[tok]
+        self.window.append(entry)
+        for tok in entry:
+            self.counts[tok] = self.counts.get(tok, 0) + 1
+
+        candidate = self._candidate()
+        if candidate == self.text:
+            return None
+        self.text = candidate
+        for fn in self.listeners:
+            fn(candidate)
+        return candidate
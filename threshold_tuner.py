@@ -0,0 +1,176 @@
+"""
+threshold_tuner.py
+Online controller for the pothole detector's thresholds.
+
+Dusk, tunnels and wet asphalt change what the fixed thresholds let through.
+Wet, textured asphalt floods the combined edge/dark mask: edges cover a tenth
+of the frame, contours and size-passing (false) candidates multiply, and the
+filter + tracking cost with them. Flat low light starves it of edges. After
+every frame the tuner reads the detector's frame_stats (gray_eq luma, edge
+density, contour and size-passing candidate counts), smooths them, and moves
+the detector's per-instance thresholds one step at a time:
+
+    flooding (contours > TARGET * BAND_HIGH or edges > EDGE_DENSITY_HIGH)
+        -> raise Canny if edges are the source, else pull the dark
+           threshold down toward the frame luma
+    calm (contours < TARGET and edges normal)
+        -> relax tightened thresholds back toward the defaults
+    starving (contours < TARGET * BAND_LOW and edges < EDGE_DENSITY_LOW)
+        -> lower Canny below the default; an empty road with normal
+           contrast is not a reason to loosen
+    too many size-passing candidates -> scale MIN/MAX_AREA up (back down
+        to the defaults once they are rare again)
+
+Hysteresis: tightening and relaxing use thresholds far apart, the smoothed
+state has to persist for HOLD_FRAMES, and there are COOLDOWN_FRAMES after
+each step, so a pothole passing through (a short burst of contours) does
+not move anything. Every decision is printed and kept in tuner.decisions.
+"""
+
+
+import math
+
+import pothole_detector as pd
+
+# -----------------------
+# Configuration
+# -----------------------
+TARGET_CONTOURS = 8.0      # contours per frame in the combined mask
+BAND_LOW = 0.3             # starving below TARGET * BAND_LOW (with flat edges)
+BAND_HIGH = 3.0            # flooding above TARGET * BAND_HIGH
+CANDIDATES_HIGH = 1.5      # size-passing candidates per frame before MIN/MAX_AREA scale up
+CANDIDATES_LOW = 0.3
+EDGE_DENSITY_HIGH = 0.02   # share of edge pixels (a dry road is ~0.007)
+EDGE_DENSITY_LOW = 0.002   # below this the frame lacks contrast
+EMA_ALPHA = 0.05
+HOLD_FRAMES = 15           # frames a state has to persist before a step
+COOLDOWN_FRAMES = 15       # frames to let a step take effect
+CANNY_STEP = 1.25          # multiplicative
+CANNY_STEP_MAX = 2.0
+CANNY_SCALE_MIN, CANNY_SCALE_MAX = 0.5, 3.0
+DARK_STEP = 10             # minimum step of the dark threshold (gray levels)
+DARK_MIN = 60
+AREA_STEP = 1.25           # multiplicative
+AREA_SCALE_MAX = 3.0
+# -----------------------
+
+
+class ThresholdTuner:
+    """Call update() once per frame after detector.process()"""
+
+    def __init__(self, detector, target=TARGET_CONTOURS, verbose=True):
+        self.det = detector
+        self.target = target
+        self.verbose = verbose
+        self.ema = None       # smoothed frame_stats
+        self.state, self.held = None, 0  # 'flooding' / 'calm' / 'starving', frames in that state
+        self.hot = 0          # consecutive frames with too many size-passing candidates
+        self.cooldown = 0
+        self.canny_scale = 1.0
+        self.area_scale = 1.0
+        self.decisions = []   # [(frame_idx, reason, settings)]
+
+    def settings(self):
+        d = self.det
+        return {'canny': (d.canny_lo, d.canny_hi), 'dark_thresh': d.dark_thresh,
+                'min_area': d.min_area, 'max_area': d.max_area}
+
+    def _smooth(self, stats):
+        if self.ema is None:
+            self.ema = dict(stats)
+        else:
+            for k, v in stats.items():
+                self.ema[k] += EMA_ALPHA * (v - self.ema[k])
+        return self.ema
+
+    def _classify(self, ema):
+        if ema['contours'] > self.target * BAND_HIGH or ema['edge_density'] > EDGE_DENSITY_HIGH:
+            return 'flooding'
+        if ema['contours'] < self.target * BAND_LOW and ema['edge_density'] < EDGE_DENSITY_LOW:
+            return 'starving'
+        if ema['contours'] < self.target and ema['edge_density'] < EDGE_DENSITY_HIGH / 2:
+            return 'calm'
+        return None  # inside the hysteresis band: leave everything as it is
+
+    def _apply(self):
+        d = self.det
+        d.canny_lo = int(round(pd.CANNY_LOW * self.canny_scale))
+        d.canny_hi = int(round(pd.CANNY_HIGH * self.canny_scale))
+        d.min_area = int(pd.MIN_AREA * self.area_scale)
+        d.max_area = int(pd.MAX_AREA * self.area_scale)
+
+    def _log(self, reason):
+        s = self.settings()
+        self.decisions.append((self.det.frame_idx, reason, s))
+        if self.verbose:
+            print(f"[tuner] frame {self.det.frame_idx}: {reason} -> canny {s['canny'][0]}/{s['canny'][1]}, "
+                  f"dark {s['dark_thresh']}, area {s['min_area']}-{s['max_area']}")
+
+    def update(self):
+        """Observe the last frame; returns True if a threshold changed"""
+        stats = self.det.frame_stats
+        if not stats:
+            return False
+        ema = self._smooth(stats)
+        state = self._classify(ema)
+        self.held = self.held + 1 if state == self.state else 1
+        self.state = state
+        self.hot = self.hot + 1 if ema['candidates'] > CANDIDATES_HIGH else 0
+
+        if self.cooldown:
+            self.cooldown -= 1
+            return False
+        step = None
+        if state and self.held >= HOLD_FRAMES:
+            step = self._tighten(ema) if state == 'flooding' else self._relax() if state == 'calm' else self._loosen()
+        reason = f"{state} ({ema['contours']:.1f} contours/frame, edges {ema['edge_density']:.1%})"
+        if step is None:
+            if self.hot >= HOLD_FRAMES and self.area_scale < AREA_SCALE_MAX:
+                self.area_scale = min(AREA_SCALE_MAX, self.area_scale * AREA_STEP)
+                step = reason = f"{ema['candidates']:.1f} sized candidates/frame"
+            elif ema['candidates'] < CANDIDATES_LOW and self.area_scale > 1.0 and state == 'calm':
+                self.area_scale = max(1.0, self.area_scale / AREA_STEP)
+                step = reason = f"sized candidates rare ({ema['candidates']:.2f}/frame)"
+        if step is None:
+            return False
+        self._apply()
+        self._log(reason)
+        self.held = self.hot = 0
+        self.cooldown = COOLDOWN_FRAMES
+        return True
+
+    def _tighten(self, ema):
+        d = self.det
+        if ema['edge_density'] > EDGE_DENSITY_HIGH and self.canny_scale < CANNY_SCALE_MAX:
+            # Step with the excess: small steps split a saturated edge mask into more contours
+            step = min(CANNY_STEP_MAX, max(CANNY_STEP, math.sqrt(ema['edge_density'] / EDGE_DENSITY_HIGH)))
+            self.canny_scale = min(CANNY_SCALE_MAX, self.canny_scale * step)
+            return 'canny'
+        floor = max(DARK_MIN, int(ema['luma']))
+        if d.dark_thresh > floor:
+            # Halve the distance to the frame luma: 200 excludes nothing on a 70-luma frame
+            d.dark_thresh = max(floor, d.dark_thresh - max(DARK_STEP, (d.dark_thresh - floor) // 2))
+            return 'dark'
+        if self.canny_scale < CANNY_SCALE_MAX:
+            self.canny_scale = min(CANNY_SCALE_MAX, self.canny_scale * CANNY_STEP)
+            return 'canny'
+        return None  # every knob at its limit
+
+    def _relax(self):
+        d = self.det
+        if d.dark_thresh < pd.DARK_MEAN_THRESH:
+            d.dark_thresh = min(pd.DARK_MEAN_THRESH,
+                                d.dark_thresh + max(DARK_STEP, (pd.DARK_MEAN_THRESH - d.dark_thresh) // 2))
+            return 'dark'
+        if self.canny_scale > 1.0:
+            self.canny_scale = max(1.0, self.canny_scale / CANNY_STEP)
+            return 'canny'
+        return None
+
+    def _loosen(self):
+        if self._relax():
+            return 'relax'
+        if self.canny_scale > CANNY_SCALE_MIN:
+            self.canny_scale = max(CANNY_SCALE_MIN, self.canny_scale / CANNY_STEP)
+            return 'canny'
+        return None
@@ -0,0 +1,150 @@
+"""
+trip_analytics.py
+Streaming aggregation of detector output into the series behind
+nura-spring-dynamics/analysis.html. Frame and confirmation events are folded
+into per-second and per-minute buckets (fixed-length rings) and a fixed-bin
+latency histogram, so memory stays bounded however long the trip is. The
+rollup is written as precomputed JSON that the page loads directly.
+"""
+
+import json
+import os
+import time
+from collections import deque
+
+# -----------------------
+# Configuration
+# -----------------------
+KINDS = ('pothole', 'puddle', 'bump')
+MAX_SECOND_BUCKETS = 600          # last 10 minutes at 1 s resolution
+MAX_MINUTE_BUCKETS = 24 * 60      # a full day at 1 min resolution
+ROUGH_FULL_SCALE = 0.05           # candidate area / ROI area that maps to roughness 10
+LATENCY_EDGES_MS = (1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000)
+OUTPUT_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "nura-spring-dynamics", "data", "trip_analytics.json")
+WRITE_EVERY_SEC = 5.0
+# -----------------------
+
+
+def _new_bucket(start):
+    return {'t': start, 'frames': 0, 'rough_sum': 0.0, 'counts': dict.fromkeys(KINDS, 0)}
+
+
+class TripAnalytics:
+    """Feed on_frame() every processed frame and on_confirm() per confirmed obstacle"""
+
+    def __init__(self, roi_area, output=OUTPUT_JSON):
+        self.roi_area = float(roi_area)
+        self.output = output
+        self.seconds = deque(maxlen=MAX_SECOND_BUCKETS)
+        self.minutes = deque(maxlen=MAX_MINUTE_BUCKETS)
+        self.cur_sec = None
+        self.cur_min = None
+        self.totals = dict.fromkeys(KINDS, 0)
+        self.frames = 0
+        self.rough_total = 0.0
+        self.duration = 0.0
+        self.latency_counts = [0] * (len(LATENCY_EDGES_MS) + 1)
+        self.latency_max = 0.0
+        self._last_write = 0.0
+
+    def _roll(self, t):
+        sec = int(t)
+        if self.cur_sec is None or sec != self.cur_sec['t']:
+            if self.cur_sec is not None:
+                self.seconds.append(self.cur_sec)
+            self.cur_sec = _new_bucket(sec)
+        minute = sec - sec % 60
+        if self.cur_min is None or minute != self.cur_min['t']:
+            if self.cur_min is not None:
+                self.minutes.append(self.cur_min)
+            self.cur_min = _new_bucket(minute)
+
+    def on_frame(self, t, detections):
+        """t: seconds since trip start; detections: tuples with area at index 4"""
+        self._roll(t)
+        area = sum(d[4] for d in detections)
+        rough = 10.0 * min(1.0, area / (self.roi_area * ROUGH_FULL_SCALE))
+        for b in (self.cur_sec, self.cur_min):
+            b['frames'] += 1
+            b['rough_sum'] += rough
+        self.frames += 1
+        self.rough_total += rough
+        self.duration = max(self.duration, t)
+
+    def on_confirm(self, t, kind='pothole', latency_ms=None):
+        self._roll(t)
+        for b in (self.cur_sec, self.cur_min):
+            b['counts'][kind] += 1
+        self.totals[kind] += 1
+        if latency_ms is not None:
+            i = 0
+            while i < len(LATENCY_EDGES_MS) and latency_ms > LATENCY_EDGES_MS[i]:
+                i += 1
+            self.latency_counts[i] += 1
+            self.latency_max = max(self.latency_max, latency_ms)
+
+    def latency_percentile(self, q):
+        """Upper bin edge containing the q-th percentile (ms)"""
+        n = sum(self.latency_counts)
+        if not n:
+            return None
+        target, acc = q * n, 0
+        for i, c in enumerate(self.latency_counts):
+            acc += c
+            if acc >= target:
+                return LATENCY_EDGES_MS[i] if i < len(LATENCY_EDGES_MS) else round(self.latency_max, 1)
+        return round(self.latency_max, 1)
+
+    @staticmethod
+    def _series(buckets):
+        out = {'t': [], 'roughness': [], 'adjustments': []}
+        for k in KINDS:
+            out[k] = []
+        for b in buckets:
+            out['t'].append(b['t'])
+            out['roughness'].append(round(b['rough_sum'] / b['frames'], 2) if b['frames'] else 0.0)
+            out['adjustments'].append(sum(b['counts'].values()))
+            for k in KINDS:
+                out[k].append(b['counts'][k])
+        return out
+
+    def snapshot(self):
+        seconds = list(self.seconds) + ([self.cur_sec] if self.cur_sec else [])
+        minutes = list(self.minutes) + ([self.cur_min] if self.cur_min else [])
+        adjustments = sum(self.totals.values())
+        hours = self.duration / 3600.0
+        return {
+            'generated': time.time(),
+            'trip': {
+                'duration_s': round(self.duration, 1),
+                'frames': self.frames,
+                'obstacles': adjustments,
+                'adjustments': adjustments,
+                'adjustments_per_hr': round(adjustments / hours, 1) if hours > 0 else 0,
+                'roughness_mean': round(self.rough_total / self.frames, 2) if self.frames else 0.0,
+            },
+            'totals': dict(self.totals),
+            'per_second': self._series(seconds),
+            'per_minute': self._series(minutes),
+            'latency_ms': {
+                'edges': list(LATENCY_EDGES_MS),
+                'counts': list(self.latency_counts),
+                'p50': self.latency_percentile(0.50),
+                'p95': self.latency_percentile(0.95),
+                'p99': self.latency_percentile(0.99),
+                'max': round(self.latency_max, 1),
+            },
+        }
+
+    def write(self, force=False):
+        """Atomically write the rollup JSON (rate-limited unless force=True)"""
+        now = time.perf_counter()
+        if not force and now - self._last_write < WRITE_EVERY_SEC:
+            return
+        self._last_write = now
+        os.makedirs(os.path.dirname(self.output), exist_ok=True)
+        tmp = self.output + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp, self.output)
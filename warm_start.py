@@ -0,0 +1,114 @@
+"""
+warm_start.py
+Startup snapshots so the first seconds of a drive are useful:
+  - the constructed easyocr Reader is pickled once and restored on later boots
+    (skips model construction and easyocr's weight-file checksum pass)
+  - the MOG2 background image is saved per source (video file or camera) at
+    the end of a run and can seed the subtractor at boot. On the sample
+    clips this has not beaten a cold start yet (see base2.SEED_BACKGROUND)
+Loaders can be restored concurrently with restore_parallel().
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "warm_state")
+BACKGROUND_PREFIX = "mog2_background"
+SEED_FRAMES = 5      # applies of the saved background at a 1/k learning rate
+SEED_NOISE = 10.0    # gray-level jitter per apply, so the per-pixel variances warm up too
+
+
+def _path(name):
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+def load_reader(langs, gpu=False):
+    """Restore a pickled easyocr Reader; build and snapshot one if missing/stale"""
+    import easyocr
+    import torch
+
+    key = f"easyocr_{'-'.join(langs)}_{easyocr.__version__}_torch{torch.__version__}.pt"
+    path = _path(key.replace("+", "_"))
+    if os.path.exists(path):
+        try:
+            return torch.load(path, weights_only=False)
+        except Exception as e:
+            print(f"Reader snapshot unusable ({e}); rebuilding")
+
+    reader = easyocr.Reader(langs, gpu=gpu)
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        torch.save(reader, tmp)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"Could not snapshot reader: {e}")
+    return reader
+
+
+def background_name(source):
+    """Snapshot file for a video path or camera index, so scenes never share a background"""
+    if isinstance(source, int) or str(source).isdigit():
+        key = f"cam{source}"
+    else:
+        key = os.path.splitext(os.path.basename(str(source)))[0]
+    key = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)
+    return f"{BACKGROUND_PREFIX}_{key}.npy"
+
+
+def load_background(source, shape=None):
+    """Saved background image for `source` (matching `shape` if given), or None"""
+    path = _path(background_name(source))
+    if not os.path.exists(path):
+        return None
+    bg = np.load(path)
+    if shape is not None and bg.shape != tuple(shape):
+        return None
+    return bg
+
+
+def seed_background(bg_sub, background, frames=SEED_FRAMES, noise=SEED_NOISE):
+    """Initialise a MOG2 subtractor from a saved background image.
+
+    One apply at learningRate=1 leaves every pixel at MOG2's initial variance;
+    a few jittered applies at a decaying rate give a weak prior (worth
+    `frames` frames) that live frames quickly take over.
+    """
+    if background is None:
+        return False
+    rng = np.random.default_rng(0)
+    for k in range(1, frames + 1):
+        jitter = rng.normal(0.0, noise, background.shape) if noise else 0.0
+        bg_sub.apply(np.clip(background + jitter, 0, 255).astype(np.uint8), learningRate=1.0 / k)
+    return True
+
+
+def save_background(bg_sub, source):
+    bg = bg_sub.getBackgroundImage()
+    if bg is None:
+        return
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    name = background_name(source)
+    tmp = _path(name + ".tmp.npy")
+    np.save(tmp, bg)
+    os.replace(tmp, _path(name))
+
+
+def restore_parallel(**loaders):
+    """Run zero-arg loaders concurrently; returns ({name: result}, {name: seconds})"""
+    results, timings = {}, {}
+
+    def timed(name, fn):
+        t0 = time.perf_counter()
+        out = fn()
+        timings[name] = time.perf_counter() - t0
+        return out
+
+    with ThreadPoolExecutor(max_workers=max(1, len(loaders))) as pool:
+        futures = {name: pool.submit(timed, name, fn) for name, fn in loaders.items()}
+        for name, fut in futures.items():
+            results[name] = fut.result()
+    return results, timings
@@ -0,0 +1,115 @@
+"""
+wheel_corridor.py
+Left/right tyre-path corridors in image space, from vehicle track width and a
+pinhole camera calibration.
+
+The road is taken as a flat plane. For each ROI row, the forward distance is
+recovered from the camera height and pitch, and the two wheel paths
+(track/2 +- tyre/2 + margin, shifted by the camera's lateral mount offset) are
+projected back to pixel spans. The detector crops its heavy processing to the
+columns the corridors cover and ignores candidates outside both of them;
+every detection that survives is tagged with the wheel(s) it will hit.
+
+The crop is the bounding box of both paths, strip between the wheels
+included: under perspective the paths fan out from the horizon to the bottom
+corners, so separate per-wheel boxes cover almost the same columns.
+Candidates are kept whole rather than clipped to the paths, so a pothole the
+car straddles (overlapping both inner margins) still reaches MIN_AREA.
+"""
+
+import math
+
+import cv2
+import numpy as np
+
+# -----------------------
+# Configuration
+# -----------------------
+TRACK_WIDTH_M = 1.55       # centre-to-centre distance between left and right tyres
+TYRE_WIDTH_M = 0.22
+CORRIDOR_MARGIN_M = 0.25   # steering / lane-keeping slack on each side of a tyre
+CAM_HEIGHT_M = 1.30
+CAM_PITCH_DEG = 8.0        # downward tilt of the optical axis
+CAM_HFOV_DEG = 90.0        # used when no focal length is given
+CAM_OFFSET_M = 0.0         # camera right of the vehicle centreline (+) / left (-)
+MAX_RANGE_M = 40.0         # rows looking further ahead than this are not processed
+# -----------------------
+
+WHEELS = ('left', 'right')
+
+
+class WheelCorridor:
+    """Per-row pixel spans of the two tyre paths inside the detector ROI"""
+
+    def __init__(self, width, height, y_start, focal_px=None, cx=None, cy=None, track_m=TRACK_WIDTH_M,
+                 tyre_m=TYRE_WIDTH_M, margin_m=CORRIDOR_MARGIN_M, cam_height_m=CAM_HEIGHT_M,
+                 pitch_deg=CAM_PITCH_DEG, offset_m=CAM_OFFSET_M, max_range_m=MAX_RANGE_M):
+        self.W, self.H, self.y_start = width, height, y_start
+        f = focal_px or (width / 2) / math.tan(math.radians(CAM_HFOV_DEG) / 2)
+        cx = width / 2 if cx is None else cx
+        cy = height / 2 if cy is None else cy
+        p = math.radians(pitch_deg)
+
+        # Forward ground distance Z for each ROI row (pinhole, flat road)
+        v = np.arange(y_start, height, dtype=np.float64) + 0.5
+        t = (v - cy) / f
+        denom = math.sin(p) + t * math.cos(p)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = cam_height_m * (math.cos(p) - t * math.sin(p)) / denom
+        valid = (denom > 1e-6) & (z > 0) & (z <= max_range_m)
+        depth = np.where(valid, z * math.cos(p) + cam_height_m * math.sin(p), np.nan)  # along the optical axis
+
+        half = tyre_m / 2 + margin_m
+        self.spans = {}  # wheel -> (u0, u1) float arrays per ROI row (NaN where not visible)
+        for wheel, centre in (('left', -track_m / 2), ('right', track_m / 2)):
+            x0, x1 = centre - half - offset_m, centre + half - offset_m
+            u0 = np.clip(cx + f * x0 / depth, 0, width - 1)
+            u1 = np.clip(cx + f * x1 / depth, 0, width - 1)
+            self.spans[wheel] = (np.where(u1 > u0, u0, np.nan), np.where(u1 > u0, u1, np.nan))
+
+        rows = np.flatnonzero(valid)
+        lo = [np.nanmin(self.spans[w][0]) for w in WHEELS if not np.all(np.isnan(self.spans[w][0]))]
+        hi = [np.nanmax(self.spans[w][1]) for w in WHEELS if not np.all(np.isnan(self.spans[w][1]))]
+        if not len(rows) or not lo:
+            raise ValueError("wheel corridors are not visible in the ROI with this calibration")
+        # Processing window in ROI coordinates
+        self.x0, self.x1 = int(min(lo)), int(math.ceil(max(hi))) + 1
+        self.r0 = int(rows[0])
+
+    @property
+    def window_fraction(self):
+        """Share of ROI pixels inside the processing window"""
+        roi_rows = self.H - self.y_start
+        return (self.x1 - self.x0) * (roi_rows - self.r0) / float(self.W * roi_rows)
+
+    @property
+    def coverage_fraction(self):
+        """Share of ROI pixels inside either corridor"""
+        covered = 0.0
+        for u0, u1 in self.spans.values():
+            covered += np.nansum(u1 - u0 + 1)
+        return covered / ((self.H - self.y_start) * self.W)
+
+    def wheels_for(self, x, y, w, h):
+        """Wheels whose corridor overlaps an ROI-coordinate bbox, e.g. ('left',) or ('left', 'right')"""
+        r0, r1 = max(0, y), min(self.H - self.y_start, y + h)
+        hit = []
+        for wheel in WHEELS:
+            u0, u1 = self.spans[wheel]
+            seg0, seg1 = u0[r0:r1], u1[r0:r1]
+            if not len(seg0) or np.all(np.isnan(seg0)):
+                continue
+            if np.nanmin(seg0) <= x + w and np.nanmax(seg1) >= x:
+                hit.append(wheel)
+        return tuple(hit)
+
+    def draw(self, frame, color=(80, 200, 80)):
+        """Outline both corridors on a full frame"""
+        for u0, u1 in self.spans.values():
+            rows = np.flatnonzero(~np.isnan(u0))
+            if not len(rows):
+                continue
+            left = [(int(u0[r]), r + self.y_start) for r in rows[::8]]
+            right = [(int(u1[r]), r + self.y_start) for r in rows[::-8]]
+            cv2.polylines(frame, [np.array(left + right, np.int32)], True, color, 1, cv2.LINE_AA)
+        return frame